@@ -2,4 +2,82 @@ CLIENT_ID = ""
 CLIENT_SECRET = ""
 CODE_AUTH = ""
 CODE_CHALLENGE = ""
-USERNAME = ""
\ No newline at end of file
+USERNAME = ""
+
+# Number of concurrent requests used while fetching the board
+FETCH_WORKERS = 4
+# Seconds before the cached season catalogue is revalidated
+SEASONAL_CACHE_TTL = 24 * 3600
+
+# Cover cache limits: bytes on disk and decoded covers kept in memory
+COVER_CACHE_MAX_BYTES = 200 * 1024 * 1024
+COVER_MEMORY_ITEMS = 256
+
+# Update existing cards in place on refresh instead of rebuilding the board
+INCREMENTAL_REFRESH = True
+
+# Episode updates: debounce window before writing to MAL and retry attempts
+UPDATE_DEBOUNCE_MS = 800
+UPDATE_RETRIES = 3
+
+# "watching" builds the board from the watching list alone,
+# "catalogue" joins it against the full season catalogue
+FETCH_MODE = "watching"
+
+# Countdown scheduling: seconds after an episode airs before re-querying
+# AniList, retry interval while it has not updated, and an optional full
+# background sync (minutes, 0 disables it)
+AIRING_REFRESH_DELAY = 5 * 60
+AIRING_RETRY_INTERVAL = 15 * 60
+BACKGROUND_SYNC_MINUTES = 0
+
+# "widgets" builds an AnimeWidget per title, "delegate" paints cards from a
+# shared model into virtualized list views, "image" renders the board to a
+# PNG, sets it as the wallpaper and exits (see render.py)
+RENDER_MODE = "widgets"
+
+# Attempts per request on 429, 5xx or connection errors (see ratelimit.py)
+REQUEST_RETRIES = 4
+
+# Per-host pacing overrides: {"graphql.anilist.co": (requests per second, burst)}
+RATE_LIMITS = {}
+
+# Record spans for refreshes, fetch phases and HTTP calls (tray menu > Stats)
+TRACING = False
+TRACE_BUFFER_SIZE = 5000
+
+# Seasons kept in the local catalogue index (cache/catalogue.json), current one included.
+# Shows that started in an earlier season and are still airing stay on the board.
+CATALOGUE_SEASONS = 4
+
+# Board daemon (python mal.py --daemon): the GUI uses it when it is running
+USE_DAEMON = True
+DAEMON_PORT = 47615
+DAEMON_REFRESH_MINUTES = 30
+# Seconds a daemon board is reused by refreshes from other clients
+DAEMON_MIN_AGE = 60
+DAEMON_POLL_SECONDS = 50
+DAEMON_RETRY_SECONDS = 30
+
+# Put entries on the board as they resolve on start-up and tray refreshes
+STREAM_REFRESH = True
+
+# HTTP: connect and read timeouts in seconds, pooled connections per host, and
+# BASE_URLS overrides such as {"mal": "http://127.0.0.1:8080/v2"}
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 30
+HTTP_POOL_SIZE = 16
+HTTP_KEEP_ALIVE = True
+BASE_URLS = {}
+
+# Hours between full syncs of the watching list; refreshes in between only fetch
+# entries changed since the last sync
+WATCHING_FULL_SYNC_HOURS = 24
+
+# Static board image (render.py): size in pixels, output path (None for
+# cache/board.png), the largest card scale, and an optional wallpaper command
+# such as ["feh", "--bg-fill", "{path}"] replacing the built-in setters
+RENDER_SIZE = (1920, 1080)
+RENDER_PATH = None
+RENDER_MAX_SCALE = 1.0
+WALLPAPER_COMMAND = None
@@ -1,11 +1,107 @@
-import requests
 import json
 import os
+import threading
+import time
 from auth import config
+import ratelimit
+import transport
+from cache import write_json_atomic
 
 client_id = config.CLIENT_ID
 client_secret = config.CLIENT_SECRET
 
+TOKENS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tokens.json")
+
+# Refresh this many seconds before the access token actually expires
+REFRESH_MARGIN = 10 * 60
+
+class TokenManager:
+    """Holds the OAuth tokens in memory and refreshes them before they expire.
+
+    Tokens are read from disk once, and again before every refresh: the
+    daemon, the wallpaper, render.py and the CLI each hold their own copy,
+    and MAL rotates the refresh token whenever one of them refreshes.
+    Refreshes are single-flight: concurrent callers that saw the same stale
+    token wait for one refresh instead of each starting their own.
+    """
+    def __init__(self, path=TOKENS_PATH):
+        self.path = path
+        self._tokens = None
+        self._lock = threading.Lock()
+
+    def tokens(self):
+        if self._tokens is None:
+            with self._lock:
+                if self._tokens is None:
+                    self._tokens = self._load()
+        return self._tokens
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                tokens = json.load(f)
+        except FileNotFoundError:
+            print(f"tokens.json not found at {self.path}.")
+            return None
+        except json.JSONDecodeError as e:
+            print(f"JSON decode error in tokens.json: {e}")
+            return None
+        if "access_token" not in tokens:
+            print("access_token missing in tokens.json.")
+            return None
+        if "expires_at" not in tokens and "expires_in" in tokens:
+            # Older files only have expires_in; count it from when the file was written
+            tokens["expires_at"] = os.path.getmtime(self.path) + tokens["expires_in"]
+        return tokens
+
+    def save(self, tokens):
+        tokens = dict(tokens)
+        if "expires_in" in tokens:
+            tokens["expires_at"] = time.time() + tokens["expires_in"]
+        write_json_atomic(self.path, tokens)
+        self._tokens = tokens
+        return tokens
+
+    def expires_soon(self, tokens):
+        expires_at = tokens.get("expires_at")
+        return expires_at is not None and expires_at - time.time() < REFRESH_MARGIN
+
+    def access_token(self):
+        tokens = self.tokens()
+        if tokens is None:
+            raise Exception("No tokens found. Please run initial authorization first.")
+        if self.expires_soon(tokens):
+            refreshed = self.refresh(stale_token=tokens["access_token"])
+            if refreshed:
+                tokens = refreshed
+        return tokens["access_token"]
+
+    def refresh(self, stale_token=None):
+        """Refresh the tokens unless another caller or process already replaced stale_token."""
+        with self._lock:
+            # Another process may have refreshed since, rotating the refresh token held here
+            current = self._load() or self._tokens
+            if current and stale_token and current.get("access_token") != stale_token:
+                self._tokens = current
+                return current
+            if not current:
+                print("No tokens found. Please run initial authorization first.")
+                return None
+
+            data = {
+                "client_id": client_id,
+                "client_secret": client_secret,
+                "grant_type": "refresh_token",
+                "refresh_token": current.get("refresh_token")
+            }
+            response = ratelimit.request("POST", transport.url("oauth", "/token"), ratelimit.INTERACTIVE, data=data)
+            if response.status_code != 200:
+                print("Failed to refresh token:", response.status_code, response.text)
+                return None
+            return self.save(response.json())
+
+token_manager = TokenManager()
+
 def exchange_code_for_tokens(authorization_code, code_verifier):
     data = {
         "client_id": client_id,
@@ -15,59 +111,23 @@ def exchange_code_for_tokens(authorization_code, code_verifier):
         "code_verifier": code_verifier
     }
 
-    response = requests.post("https://myanimelist.net/v1/oauth2/token", data=data)
+    response = ratelimit.request("POST", transport.url("oauth", "/token"), ratelimit.INTERACTIVE, data=data)
     if response.status_code == 200:
-        tokens = response.json()
-        with open("tokens.json", "w") as f:
-            json.dump(tokens, f)
-        print("Tokens saved to tokens.json")
+        tokens = token_manager.save(response.json())
+        print(f"Tokens saved to {token_manager.path}")
         return tokens
     else:
         print("Error:", response.status_code, response.text)
         return None
 
 def refresh_token():
-    try:
-        with open("tokens.json", "r") as f:
-            tokens = json.load(f)
-    except FileNotFoundError:
-        print("No tokens found. Please run initial authorization first.")
-        return None
-
-    data = {
-        "client_id": client_id,
-        "client_secret": client_secret,
-        "grant_type": "refresh_token",
-        "refresh_token": tokens.get("refresh_token")
-    }
-
-    response = requests.post("https://myanimelist.net/v1/oauth2/token", data=data)
-    if response.status_code == 200:
-        new_tokens = response.json()
-        with open("tokens.json", "w") as f:
-            json.dump(new_tokens, f)
+    new_tokens = token_manager.refresh()
+    if new_tokens:
         print("Tokens refreshed and saved.")
-        return new_tokens
-    else:
-        print("Failed to refresh token:", response.status_code, response.text)
-        return None
+    return new_tokens
 
 def load_tokens():
-    tokens_path = os.path.join(os.path.dirname(__file__), "tokens.json")
-    try:
-        with open(tokens_path, "r", encoding="utf-8") as f:
-            tokens = json.load(f)
-            if "access_token" not in tokens:
-                print("access_token missing in tokens.json.")
-                return None
-            return tokens
-    except FileNotFoundError:
-        print(f"tokens.json not found at {tokens_path}.")
-    except json.JSONDecodeError as e:
-        print(f"JSON decode error in tokens.json: {e}")
-    except Exception as e:
-        print(f"Unexpected error loading tokens: {e}")
-    return None
+    return token_manager.tokens()
 
 if __name__ == "__main__":
     # tokens = exchange_code_for_tokens(config.CODE_AUTH, config.CODE_CHALLENGE)
@@ -75,4 +135,4 @@ if __name__ == "__main__":
     tokens = refresh_token()
 
     if tokens:
-        access_token = tokens.get("access_token")
\ No newline at end of file
+        access_token = tokens.get("access_token")
@@ -0,0 +1,54 @@
+"""Compare the watching-list fetch mode against the season catalogue join.
+
+Runs fetch_anime_data in each mode against the live APIs and prints wall
+time, request count and bytes received. The catalogue join is measured both
+cold (cache bypassed) and warm (season catalogue served from cache).
+
+    python benchmarks/fetch_modes.py [runs]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+import mal
+
+stats = {"requests": 0, "bytes": 0}
+_send = requests.Session.send
+
+def counting_send(self, request, **kwargs):
+    response = _send(self, request, **kwargs)
+    stats["requests"] += 1
+    stats["bytes"] += len(response.content)
+    return response
+
+def measure(runs, **kwargs):
+    times = []
+    for _ in range(runs):
+        stats["requests"] = stats["bytes"] = 0
+        start = time.perf_counter()
+        data = mal.fetch_anime_data(**kwargs)
+        times.append(time.perf_counter() - start)
+    titles = sum(len(day) for day in data)
+    return statistics.median(times), stats["requests"], stats["bytes"], titles
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    requests.Session.send = counting_send
+
+    cases = [
+        ("watching", {"mode": "watching"}),
+        ("catalogue (cold)", {"mode": "catalogue", "force_refresh": True}),
+        ("catalogue (warm)", {"mode": "catalogue"}),
+    ]
+    print(f"{'mode':<18} {'median s':>9} {'requests':>9} {'bytes':>10} {'titles':>7}")
+    for name, kwargs in cases:
+        seconds, count, size, titles = measure(runs, **kwargs)
+        print(f"{name:<18} {seconds:>9.3f} {count:>9} {size:>10} {titles:>7}")
+
+if __name__ == "__main__":
+    main()
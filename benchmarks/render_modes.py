@@ -0,0 +1,182 @@
+"""Compare the widget-per-title board, the model/delegate board and the static image.
+
+Each mode and list size runs in a fresh offscreen process. The board is
+built from synthetic entries without covers, so only widget construction,
+layout and painting are measured. Reported per run:
+
+    build ms   apply_anime_data plus the first full paint
+    update ms  a second refresh where every countdown changed
+    edit ms    a third refresh where one title's episode count changed
+    rss MiB    resident memory added by building the board
+    proc MiB   resident memory of the whole process after the three refreshes
+    qobjects   QObjects owned by the window
+
+The image mode renders a 1600x900 PNG (render.BoardImage) and saves it
+after every step. Its edit step starts from the saved PNG in a fresh
+BoardImage, as a new process would, and repaints only the changed card.
+Cards shrink to fit the image rather than scroll, so large lists paint
+smaller cards. Between renders the image mode keeps no process at all;
+the live modes keep proc MiB resident all week.
+
+    python benchmarks/render_modes.py [size ...]
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def rss_bytes():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def synthetic_board(size, hours_offset=0):
+    anime_by_day = [[] for _ in range(7)]
+    for i in range(size):
+        day = i % 7
+        anime_by_day[day].append({
+            "title": f"Synthetic Title {i}",
+            "mal_id": 100000 + i,
+            "watched_eps": i % 12,
+            "total_eps": 12,
+            "next_in_hours": (i * 5 + hours_offset) % 168,
+            "next_episode": i % 12 + 1,
+            "airing_at": None,
+            "episode_offset": 0,
+            "status": "GREEN" if i % 3 else "RED",
+            "cover_url": None,
+            "weekday_idx": day,
+            "score": 0
+        })
+    return anime_by_day
+
+def edited_board(size):
+    """The board after an update, with one more episode watched on the first title."""
+    anime_by_day = synthetic_board(size, hours_offset=1)
+    anime_by_day[0][0]["watched_eps"] += 1
+    return anime_by_day
+
+def run_image_child(size):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    import tempfile
+    from PyQt6.QtGui import QGuiApplication
+
+    import cache
+    import render
+
+    app = QGuiApplication([])
+    cache.CACHE_DIR = tempfile.mkdtemp(prefix="mal-render-")
+    path = os.path.join(cache.CACHE_DIR, "board.png")
+
+    before = rss_bytes()
+    start = time.perf_counter()
+    board = render.BoardImage(1600, 900)
+    board.render(synthetic_board(size))
+    board.save(path)
+    build = time.perf_counter() - start
+    after = rss_bytes()
+
+    start = time.perf_counter()
+    board.render(synthetic_board(size, hours_offset=1))
+    board.save(path)
+    update = time.perf_counter() - start
+
+    start = time.perf_counter()
+    board = render.BoardImage.load(1600, 900, path)
+    painted = board.render(edited_board(size))
+    board.save(path)
+    edit = time.perf_counter() - start
+    assert painted == 1
+
+    print(json.dumps({
+        "build_ms": build * 1000,
+        "update_ms": update * 1000,
+        "edit_ms": edit * 1000,
+        "rss_mib": (after - before) / (1024 * 1024),
+        "proc_mib": rss_bytes() / (1024 * 1024),
+        "qobjects": 0
+    }))
+
+def run_child(mode, size):
+    if mode == "image":
+        run_image_child(size)
+        return
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtCore import QObject
+    from PyQt6.QtWidgets import QApplication
+
+    from auth import config
+    import wallpaper
+
+    config.RENDER_MODE = mode
+    # Nothing but the synthetic boards below: no daemon, no fetch on either refresh path
+    config.USE_DAEMON = False
+    wallpaper.load_snapshot = lambda: None
+    wallpaper.save_snapshot = lambda anime_by_day: None
+    wallpaper.MainWindow.get_anime_data = lambda self, force_refresh=False: [[] for _ in range(7)]
+    wallpaper.MainWindow.iter_anime_data = lambda self, force_refresh=False: iter(())
+
+    app = QApplication([])
+    with open(os.path.join(ROOT, "style.qss"), "r") as f:
+        app.setStyleSheet(f.read())
+    window = wallpaper.MainWindow()
+    window.resize(1600, 900)
+    window.show()
+    app.processEvents()
+
+    before = rss_bytes()
+    start = time.perf_counter()
+    window.apply_anime_data(synthetic_board(size))
+    app.processEvents()
+    window.grab()
+    build = time.perf_counter() - start
+    after = rss_bytes()
+
+    start = time.perf_counter()
+    window.apply_anime_data(synthetic_board(size, hours_offset=1))
+    app.processEvents()
+    window.grab()
+    update = time.perf_counter() - start
+
+    start = time.perf_counter()
+    window.apply_anime_data(edited_board(size))
+    app.processEvents()
+    window.grab()
+    edit = time.perf_counter() - start
+
+    print(json.dumps({
+        "build_ms": build * 1000,
+        "update_ms": update * 1000,
+        "edit_ms": edit * 1000,
+        "rss_mib": (after - before) / (1024 * 1024),
+        "proc_mib": rss_bytes() / (1024 * 1024),
+        "qobjects": len(window.findChildren(QObject))
+    }))
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [25, 100, 400]
+    print(f"{'mode':<9} {'size':>5} {'build ms':>9} {'update ms':>10} {'edit ms':>8} {'rss MiB':>8} "
+          f"{'proc MiB':>9} {'qobjects':>9}")
+    for size in sizes:
+        for mode in ("widgets", "delegate", "image"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode, str(size)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<9} {size:>5} {result['build_ms']:>9.1f} {result['update_ms']:>10.1f} "
+                  f"{result['edit_ms']:>8.1f} {result['rss_mib']:>8.1f} {result['proc_mib']:>9.1f} "
+                  f"{result['qobjects']:>9}")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,235 @@
+"""Soak test: thousands of refreshes and episode updates on one MainWindow.
+
+Starts the stand-in server and runs an offscreen MainWindow against it in a
+child process, the way the wallpaper runs all week. Every cycle changes one
+title's watched episodes through the update queue, then refreshes the board;
+every --churn-every cycles a title is completed (its card removed) and put
+back on the list on the next cycle (a new card built), so cards and their
+covers keep being discarded and recreated.
+
+Every --sample-every cycles the child collects garbage and records RSS,
+traced memory, live QObjects, widgets and QPixmaps (memstats.counters()) and
+the median refresh latency of the cycles since the last sample. At the end
+the last sample is compared with the first one taken after --warmup cycles,
+along with the largest tracemalloc growth sites, and the run exits 1 when
+memory, object counts or refresh latency grew past the thresholds.
+
+    python benchmarks/soak.py                             # 2000 cycles, widgets
+    python benchmarks/soak.py --cycles 500 --mode delegate
+    python benchmarks/soak.py --json soak.jsonl           # keep every sample
+    python benchmarks/soak.py --no-tracemalloc            # faster, RSS and counts only
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Counters that must come back to where they were; a card being away or back is within tolerance
+OBJECT_COUNTERS = ("qobjects", "widgets", "pixmaps", "label_pixmaps", "cover_cache", "tasks")
+
+def settle(window, timeout=60):
+    """Run the event loop until no refresh, streamed batch or background task is pending."""
+    from PyQt6.QtCore import QEventLoop, QTimer
+    import tasks
+
+    loop = QEventLoop()
+    deadline = time.monotonic() + timeout
+
+    def check():
+        busy = (window.refresh_task is not None or window.stream_timer.isActive()
+                or window.update_queue.pending or tasks._active_tasks)
+        if not busy or time.monotonic() > deadline:
+            loop.quit()
+
+    timer = QTimer()
+    timer.timeout.connect(check)
+    timer.start(1)
+    loop.exec()
+    timer.stop()
+
+def episode_target(anime):
+    """A watched count one step away from the current one, never completing the title."""
+    total = anime["total_eps"] or 0
+    if anime["watched_eps"] + 1 < total or not total:
+        return anime["watched_eps"] + 1
+    return max(0, anime["watched_eps"] - 1)
+
+def sample(cycle, latencies):
+    import memstats
+    gc.collect()
+    result = {"cycle": cycle, **memstats.counters()}
+    result["refresh_ms"] = statistics.median(latencies) * 1000 if latencies else None
+    return result
+
+def print_sample(result):
+    traced = f"{result['traced_mib']:>8.1f}" if result["traced_mib"] is not None else f"{'-':>8}"
+    print(f"{result['cycle']:>6} {result['rss_mib']:>8.1f} {traced} {result['qobjects']:>8} {result['widgets']:>7} "
+          f"{result['pixmaps']:>7} {result['python_objects']:>9} {result['refresh_ms'] or 0:>10.1f}", flush=True)
+
+def run_child(args):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+
+    from auth import config
+    from suite import configure_client
+    import memstats
+
+    configure_client(args.base_url, tempfile.mkdtemp(prefix="mal-soak-"))
+    config.RENDER_MODE = args.mode
+    config.USE_DAEMON = False
+    import mal
+    import wallpaper
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    app = QApplication([])
+    with open(os.path.join(ROOT, "style.qss"), "r") as f:
+        app.setStyleSheet(f.read())
+    window = wallpaper.MainWindow()
+    window.resize(1600, 900)
+    window.show()
+    settle(window)
+
+    print(f"{'cycle':>6} {'rss MiB':>8} {'traced':>8} {'qobjects':>8} {'widgets':>7} "
+          f"{'pixmaps':>7} {'py objs':>9} {'refresh ms':>10}", flush=True)
+    samples = []
+    latencies = []
+    baseline_snapshot = None
+    completed = None
+    for cycle in range(1, args.cycles + 1):
+        entries = sorted(window.all_entries(), key=lambda anime: anime["mal_id"])
+        if completed is not None:
+            # Back on the watching list, as if re-added on MAL; the refresh below builds its card again
+            mal.update_my_list_status(completed, {"status": "watching", "num_watched_episodes": 0})
+            completed = None
+        elif cycle % args.churn_every == 0:
+            anime = next((anime for anime in entries[cycle % len(entries):] + entries if anime["total_eps"]), None)
+            if anime is not None:
+                completed = anime["mal_id"]
+                window.queue_episode_update(completed, anime["total_eps"])
+        if completed is None and entries:
+            anime = entries[cycle % len(entries)]
+            window.queue_episode_update(anime["mal_id"], episode_target(anime))
+        window.update_queue.flush()
+        settle(window)
+
+        start = time.perf_counter()
+        window.refresh_data()
+        settle(window)
+        latencies.append(time.perf_counter() - start)
+        window.grab()
+
+        if cycle % args.sample_every == 0 or cycle == args.cycles:
+            result = sample(cycle, latencies)
+            latencies = []
+            samples.append(result)
+            print_sample(result)
+            if cycle >= args.warmup and baseline_snapshot is None and tracemalloc.is_tracing():
+                baseline_snapshot = tracemalloc.take_snapshot()
+            print(json.dumps({"sample": result}), flush=True)
+
+    if baseline_snapshot is not None:
+        print("\nLargest allocation growth since warm-up:")
+        for line in memstats.top_allocations(10, baseline=baseline_snapshot):
+            print(f"  {line}")
+
+    window.cancel_refresh()
+    settle(window)
+
+def judge(samples, args):
+    """Failure messages comparing the last sample with the first one after warm-up."""
+    after_warmup = [s for s in samples if s["cycle"] >= args.warmup]
+    if len(after_warmup) < 2:
+        return [f"too few samples after a {args.warmup} cycle warm-up to judge"]
+    first, last = after_warmup[0], after_warmup[-1]
+    failures = []
+    rss_growth = last["rss_mib"] - first["rss_mib"]
+    if rss_growth > args.max_rss_growth:
+        failures.append(f"RSS grew {rss_growth:.1f} MiB (limit {args.max_rss_growth})")
+    if first["traced_mib"] is not None and last["traced_mib"] is not None:
+        traced_growth = last["traced_mib"] - first["traced_mib"]
+        if traced_growth > args.max_rss_growth / 2:
+            failures.append(f"traced memory grew {traced_growth:.1f} MiB (limit {args.max_rss_growth / 2})")
+    for key in OBJECT_COUNTERS:
+        growth = last[key] - first[key]
+        if growth > args.max_object_growth:
+            failures.append(f"{key} grew by {growth} (limit {args.max_object_growth})")
+    python_growth = (last["python_objects"] - first["python_objects"]) / first["python_objects"]
+    if python_growth > args.max_python_growth:
+        failures.append(f"Python objects grew {python_growth * 100:.1f}% (limit {args.max_python_growth * 100:.0f}%)")
+    # Medians of the first and last few samples, so one slow window does not decide it
+    window = max(1, len(after_warmup) // 4)
+    early = statistics.median(s["refresh_ms"] for s in after_warmup[:window])
+    late = statistics.median(s["refresh_ms"] for s in after_warmup[-window:])
+    if late > early * (1 + args.max_latency_drift):
+        failures.append(f"refresh latency drifted {early:.1f} -> {late:.1f} ms "
+                        f"(limit +{args.max_latency_drift * 100:.0f}%)")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cycles", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=30, help="watching list size")
+    parser.add_argument("--mode", default="widgets", choices=["widgets", "delegate"])
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--sample-every", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=200, help="cycles before the baseline sample")
+    parser.add_argument("--churn-every", type=int, default=10, help="complete and re-add a title every N cycles")
+    parser.add_argument("--no-tracemalloc", dest="tracemalloc", action="store_false")
+    parser.add_argument("--max-rss-growth", type=float, default=20.0, help="MiB")
+    parser.add_argument("--max-object-growth", type=int, default=50,
+                        help="growth allowed in each QObject, widget and pixmap count")
+    parser.add_argument("--max-python-growth", type=float, default=0.05, help="fraction of live Python objects")
+    parser.add_argument("--max-latency-drift", type=float, default=0.5, help="fraction of the early refresh time")
+    parser.add_argument("--json", help="append every sample as JSON lines to this file")
+    parser.add_argument("--child", metavar="BASE_URL", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.base_url = args.child
+        run_child(args)
+        return
+
+    from standin import StandIn, make_fixtures
+
+    standin = StandIn(make_fixtures(list_size=args.size), latency=args.latency).start()
+    try:
+        command = [sys.executable, os.path.abspath(__file__), "--child", standin.base_url] + sys.argv[1:]
+        child = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        samples = []
+        for line in child.stdout:
+            if line.startswith('{"sample"'):
+                samples.append(json.loads(line)["sample"])
+            else:
+                print(line, end="", flush=True)
+        if child.wait() != 0:
+            print(f"soak run failed with exit code {child.returncode}")
+            sys.exit(1)
+    finally:
+        standin.stop()
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            for result in samples:
+                f.write(json.dumps({"mode": args.mode, "size": args.size, **result}) + "\n")
+
+    failures = judge(samples, args)
+    print()
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print(f"OK: {args.cycles} cycles, no growth beyond the thresholds")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+"""Local stand-in for the MAL, MAL OAuth, AniList and cover image endpoints.
+
+Serves deterministic fixtures shaped like recorded API responses so the
+benchmarks run offline. Latency, connection setup cost, token expiry (401)
+and per-host rate limits (429) can be configured. Every response is counted
+per host so benchmarks can report request counts and bytes transferred, and
+new connections are counted too. JSON bodies are gzipped for clients that
+accept it, as the real APIs do.
+
+    standin = StandIn(make_fixtures(list_size=30)).start()
+    standin.base_url  # http://127.0.0.1:<port>
+"""
+import gzip
+import json
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+DAYS = ["sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
+SEASONS = ["winter", "spring", "summer", "fall"]
+
+def solid_png(width, height, rgb):
+    """A minimal solid-colour PNG, so cover fixtures need no image library."""
+    row = b"\x00" + bytes(rgb) * width
+    raw = zlib.compress(row * height)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", raw) + chunk(b"IEND", b"")
+
+def previous_season(season, year):
+    idx = SEASONS.index(season)
+    return (SEASONS[idx - 1], year - 1) if idx == 0 else (SEASONS[idx - 1], year)
+
+def make_fixtures(list_size=30, catalogue_size=400, season=None, year=None, now=None):
+    """Build a season catalogue, a watching list and AniList airing data.
+
+    list_size titles are on the watching list: most from the current season,
+    every fifth one a carry-over from the previous season, plus a few titles
+    that finished airing long ago.
+    """
+    if season is None or year is None:
+        import mal
+        season, year = mal.get_current_season()
+    now = time.time() if now is None else now
+    prev_season, prev_year = previous_season(season, year)
+
+    anime = {}
+    for i in range(catalogue_size):
+        anime_id = 50000 + i
+        anime[anime_id] = {
+            "id": anime_id,
+            "title": f"Stand-in Seasonal {i}",
+            "broadcast": {"day_of_the_week": DAYS[i % 7], "start_time": "23:30"},
+            "num_episodes": 12 if i % 4 else 24,
+            "status": "currently_airing",
+            "start_season": {"season": season, "year": year},
+        }
+    for i in range(max(1, list_size // 5)):
+        anime_id = 40000 + i
+        anime[anime_id] = {
+            "id": anime_id,
+            "title": f"Stand-in Carry-over {i}",
+            "broadcast": {"day_of_the_week": DAYS[(i + 3) % 7], "start_time": "01:00"},
+            "num_episodes": 24,
+            "status": "currently_airing",
+            "start_season": {"season": prev_season, "year": prev_year},
+        }
+    for i in range(3):
+        anime_id = 30000 + i
+        anime[anime_id] = {
+            "id": anime_id,
+            "title": f"Stand-in Finished {i}",
+            "broadcast": {"day_of_the_week": DAYS[i], "start_time": "22:00"},
+            "num_episodes": 12,
+            "status": "finished_airing",
+            "start_season": {"season": season, "year": year - 3},
+        }
+
+    current_ids = [anime_id for anime_id in anime if anime_id >= 50000]
+    carry_ids = [anime_id for anime_id in anime if 40000 <= anime_id < 50000]
+    watching_ids = []
+    for i in range(list_size):
+        if i % 5 == 4 and carry_ids:
+            watching_ids.append(carry_ids.pop(0))
+        else:
+            watching_ids.append(current_ids[i * 7 % len(current_ids)])
+    watching_ids.extend(anime_id for anime_id in anime if anime_id < 40000)
+
+    list_status = {}
+    for n, anime_id in enumerate(dict.fromkeys(watching_ids)):
+        list_status[anime_id] = {
+            "status": "watching",
+            "score": n % 10,
+            "num_episodes_watched": n % 6,
+            "is_rewatching": False,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(now - 86400 * (n + 1)))
+        }
+
+    airing = {}
+    for anime_id, record in anime.items():
+        if record["status"] != "currently_airing":
+            airing[anime_id] = {"id": anime_id + 900000, "episodes": record["num_episodes"], "schedule": []}
+            continue
+        aired = 5 + anime_id % 4
+        first_airing = int(now) - aired * 7 * 86400 + (anime_id % 7) * 3600 + 1800
+        # AniList numbers carry-over cours from 1, MAL continues the count
+        offset = 12 if anime_id < 50000 else 0
+        episodes = record["num_episodes"] - offset
+        schedule = [
+            {"episode": ep, "airingAt": first_airing + (ep - 1) * 7 * 86400}
+            for ep in range(1, episodes + 1)
+        ]
+        airing[anime_id] = {"id": anime_id + 900000, "episodes": episodes, "schedule": schedule}
+
+    return {"season": season, "year": year, "anime": anime, "list_status": list_status, "airing": airing}
+
+class StandIn:
+    """A threaded loopback HTTP server speaking just enough of each API."""
+    def __init__(self, fixtures, latency=0.0, expire_token_after=None, rate_limits=None, page_size=100,
+                 connect_latency=0.0):
+        self.fixtures = fixtures
+        self.latency = latency
+        # Added once per new connection, standing in for the TCP and TLS handshakes
+        self.connect_latency = connect_latency
+        self.expire_token_after = expire_token_after
+        # host -> (max requests, window seconds)
+        self.rate_limits = rate_limits or {}
+        self.page_size = page_size
+        self.lock = threading.Lock()
+        self.token_serial = 0
+        self.token_uses = 0
+        self.recent = defaultdict(deque)
+        self.reset_stats()
+        self.server = None
+
+    @property
+    def access_token(self):
+        return f"standin-access-{self.token_serial}"
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = defaultdict(lambda: {"requests": 0, "bytes": 0, "status": defaultdict(int)})
+            self.connections = 0
+
+    def connected(self):
+        with self.lock:
+            self.connections += 1
+        if self.connect_latency:
+            time.sleep(self.connect_latency)
+
+    def stats_snapshot(self):
+        with self.lock:
+            return {
+                host: {"requests": s["requests"], "bytes": s["bytes"], "status": dict(s["status"])}
+                for host, s in self.stats.items()
+            }
+
+    def start(self):
+        standin = self
+
+        class Handler(StandInHandler):
+            pass
+        Handler.standin = standin
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def record(self, host, status, size):
+        with self.lock:
+            stats = self.stats[host]
+            stats["requests"] += 1
+            stats["bytes"] += size
+            stats["status"][status] += 1
+
+    def rate_limited(self, host):
+        """Return seconds to wait if host is over its limit, else None."""
+        limit = self.rate_limits.get(host)
+        if not limit:
+            return None
+        max_requests, window = limit
+        now = time.monotonic()
+        with self.lock:
+            recent = self.recent[host]
+            while recent and recent[0] <= now - window:
+                recent.popleft()
+            if len(recent) >= max_requests:
+                return max(0.0, recent[0] + window - now)
+            recent.append(now)
+        return None
+
+    def check_token(self, header):
+        with self.lock:
+            if header != f"Bearer {self.access_token}":
+                return False
+            self.token_uses += 1
+            if self.expire_token_after and self.token_uses > self.expire_token_after:
+                # Token just expired; the client has to refresh it
+                self.token_uses = 0
+                self.token_serial += 1
+                return False
+            return True
+
+    def issue_token(self):
+        with self.lock:
+            self.token_serial += 1
+            self.token_uses = 0
+            return {
+                "token_type": "Bearer",
+                "expires_in": 2678400,
+                "access_token": self.access_token,
+                "refresh_token": f"standin-refresh-{self.token_serial}"
+            }
+
+    # --- MAL ---------------------------------------------------------------
+
+    def render_node(self, anime_id, fields):
+        record = self.fixtures["anime"][anime_id]
+        node = {
+            "id": anime_id,
+            "title": record["title"],
+            "main_picture": {
+                "medium": f"{self.base_url}/covers/{anime_id}.png",
+                "large": f"{self.base_url}/covers/{anime_id}l.png"
+            }
+        }
+        for field in fields:
+            if field in record:
+                node[field] = record[field]
+        return node
+
+    def page(self, items, query, path):
+        limit = min(int(query.get("limit", [self.page_size])[0]), self.page_size)
+        offset = int(query.get("offset", [0])[0])
+        data = items[offset:offset + limit]
+        paging = {}
+        if offset + limit < len(items):
+            next_query = {key: values[0] for key, values in query.items()}
+            next_query.update(limit=limit, offset=offset + limit)
+            paging["next"] = f"{self.base_url}{path}?{urlencode(next_query)}"
+        return {"data": data, "paging": paging}
+
+    def season(self, path, query):
+        fields = parse_fields(query)
+        year, season = path.rstrip("/").split("/")[-2:]
+        ids = [
+            anime_id for anime_id, record in self.fixtures["anime"].items()
+            if record["start_season"] == {"season": season, "year": int(year)}
+        ]
+        items = [{"node": self.render_node(anime_id, fields)} for anime_id in sorted(ids)]
+        return self.page(items, query, path)
+
+    def animelist(self, path, query):
+        fields = parse_fields(query)
+        status = query.get("status", [None])[0]
+        entries = list(self.fixtures["list_status"].items())
+        if status:
+            entries = [(anime_id, s) for anime_id, s in entries if s["status"] == status]
+        if query.get("sort", [None])[0] == "list_updated_at":
+            entries.sort(key=lambda item: item[1]["updated_at"], reverse=True)
+        items = []
+        for anime_id, list_status in entries:
+            item = {"node": self.render_node(anime_id, fields)}
+            if "list_status" in fields:
+                item["list_status"] = dict(list_status)
+            items.append(item)
+        return self.page(items, query, path)
+
+    def anime_details(self, anime_id, query):
+        fields = parse_fields(query)
+        node = self.render_node(anime_id, fields)
+        if "my_list_status" in fields and anime_id in self.fixtures["list_status"]:
+            node["my_list_status"] = dict(self.fixtures["list_status"][anime_id])
+        return node
+
+    def update_list_status(self, anime_id, form):
+        with self.lock:
+            list_status = self.fixtures["list_status"].setdefault(anime_id, {
+                "status": "watching", "score": 0, "num_episodes_watched": 0, "is_rewatching": False
+            })
+            if "status" in form:
+                list_status["status"] = form["status"]
+            if "score" in form:
+                list_status["score"] = int(form["score"])
+            if "num_watched_episodes" in form:
+                list_status["num_episodes_watched"] = int(form["num_watched_episodes"])
+            list_status["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+            return dict(list_status)
+
+    # --- AniList -----------------------------------------------------------
+
+    def media(self, anime_id, now):
+        airing = self.fixtures["airing"].get(anime_id)
+        if airing is None:
+            return None
+        upcoming = [s for s in airing["schedule"] if s["airingAt"] > now]
+        next_ep = None
+        if upcoming:
+            next_ep = {
+                "episode": upcoming[0]["episode"],
+                "airingAt": upcoming[0]["airingAt"],
+                "timeUntilAiring": upcoming[0]["airingAt"] - int(now)
+            }
+        return {"id": airing["id"], "idMal": anime_id, "episodes": airing["episodes"], "nextAiringEpisode": next_ep}
+
+    def graphql(self, body):
+        query = body.get("query", "")
+        variables = body.get("variables") or {}
+        now = time.time()
+        if "airingSchedules" in query:
+            return {"data": {"Page": self.airing_schedules(variables)}}
+        if "Page" in query:
+            ids = variables.get("ids") or []
+            media = [m for m in (self.media(anime_id, now) for anime_id in ids) if m]
+            per_page = variables.get("perPage", 50)
+            page = variables.get("page", 1)
+            chunk = media[(page - 1) * per_page:page * per_page]
+            return {"data": {"Page": {
+                "pageInfo": {"hasNextPage": page * per_page < len(media)},
+                "media": chunk
+            }}}
+        return {"data": {"Media": self.media(variables.get("idMal"), now)}}
+
+    def airing_schedules(self, variables):
+        media_ids = set(variables.get("mediaIds") or [])
+        after = variables.get("after", 0)
+        before = variables.get("before", 2 ** 31)
+        rows = []
+        for anime_id, airing in self.fixtures["airing"].items():
+            if airing["id"] not in media_ids:
+                continue
+            for s in airing["schedule"]:
+                if after < s["airingAt"] < before:
+                    rows.append({"mediaId": airing["id"], "episode": s["episode"], "airingAt": s["airingAt"]})
+        rows.sort(key=lambda row: (row["airingAt"], row["mediaId"]))
+        per_page = variables.get("perPage", 50)
+        page = variables.get("page", 1)
+        chunk = rows[(page - 1) * per_page:page * per_page]
+        return {"pageInfo": {"hasNextPage": page * per_page < len(rows)}, "airingSchedules": chunk}
+
+def parse_fields(query):
+    raw = ",".join(query.get("fields", []))
+    # Strip nested selections such as list_status{updated_at}
+    raw = re.sub(r"\{[^}]*\}", "", raw)
+    return [field.strip() for field in raw.split(",") if field.strip()]
+
+def host_for(path):
+    if path.startswith("/v2/"):
+        return "mal"
+    if path.startswith("/v1/oauth2"):
+        return "oauth"
+    if path.startswith("/graphql"):
+        return "anilist"
+    if path.startswith("/covers/"):
+        return "cdn"
+    return "control"
+
+class StandInHandler(BaseHTTPRequestHandler):
+    standin = None
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; with Nagle on, every request
+    # on a kept-alive connection would wait out the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.standin.connected()
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def do_PUT(self):
+        self.handle_request("PUT")
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def send(self, host, status, body=b"", content_type="application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        headers = dict(headers or {})
+        if body and content_type == "application/json" and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+        if host != "control":
+            self.standin.record(host, status, len(body))
+
+    def handle_request(self, method):
+        standin = self.standin
+        split = urlsplit(self.path)
+        path, query = split.path, parse_qs(split.query)
+        host = host_for(path)
+        body = self.read_body()
+
+        if host == "control":
+            if path == "/_standin/stats":
+                return self.send(host, 200, standin.stats_snapshot())
+            if path == "/_standin/connections":
+                return self.send(host, 200, {"connections": standin.connections})
+            if path == "/_standin/reset":
+                standin.reset_stats()
+                return self.send(host, 200, {})
+            return self.send(host, 404, {"error": "not_found"})
+
+        if standin.latency:
+            time.sleep(standin.latency)
+
+        wait = standin.rate_limited(host)
+        if wait is not None:
+            headers = {"Retry-After": str(max(1, int(round(wait))))}
+            if host == "anilist":
+                limit = standin.rate_limits[host][0]
+                headers.update({
+                    "X-RateLimit-Limit": str(limit),
+                    "X-RateLimit-Remaining": "0",
+                    "X-RateLimit-Reset": str(int(time.time() + wait))
+                })
+            return self.send(host, 429, {"error": "too_many_requests"}, headers=headers)
+
+        if host == "oauth":
+            return self.send(host, 200, standin.issue_token())
+
+        if host == "cdn":
+            match = re.match(r"/covers/(\d+)", path)
+            shade = int(match.group(1)) % 200 if match else 0
+            return self.send(host, 200, solid_png(225, 318, (40 + shade // 2, 60, 90 + shade // 3)), "image/png")
+
+        if host == "anilist":
+            try:
+                return self.send(host, 200, standin.graphql(json.loads(body or b"{}")))
+            except (ValueError, KeyError, TypeError) as e:
+                return self.send(host, 400, {"errors": [{"message": str(e)}]})
+
+        if not standin.check_token(self.headers.get("Authorization")):
+            return self.send(host, 401, {"error": "invalid_token"})
+
+        match = re.match(r"/v2/anime/(\d+)/my_list_status$", path)
+        if match and method == "PUT":
+            form = {key: values[0] for key, values in parse_qs(body.decode("utf-8")).items()}
+            return self.send(host, 200, standin.update_list_status(int(match.group(1)), form))
+        match = re.match(r"/v2/anime/(\d+)$", path)
+        if match:
+            anime_id = int(match.group(1))
+            if anime_id not in standin.fixtures["anime"]:
+                return self.send(host, 404, {"error": "not_found"})
+            return self.send(host, 200, standin.anime_details(anime_id, query))
+        if path.startswith("/v2/anime/season/"):
+            return self.send(host, 200, standin.season(path, query))
+        if re.match(r"/v2/users/[^/]+/animelist$", path):
+            return self.send(host, 200, standin.animelist(path, query))
+        return self.send(host, 404, {"error": "not_found"})
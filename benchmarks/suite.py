@@ -0,0 +1,261 @@
+"""Offline benchmark suite for the fetch pipeline and the board.
+
+Starts the local stand-in server and runs each scenario in a fresh process
+that points the transport's base URLs and the caches at it. Every run
+reports wall time, request count and bytes per host as the server saw
+them, the connections opened, and the peak RSS of the process.
+
+    python benchmarks/suite.py                       # default sizes 10 30 100
+    python benchmarks/suite.py --sizes 30 --latency 0.05
+    python benchmarks/suite.py --expire-token-after 5 --rate-limit anilist=30/60
+    python benchmarks/suite.py --json results.jsonl  # save a baseline
+    python benchmarks/suite.py --compare results.jsonl
+    python benchmarks/suite.py --connect-latency 0.1 --no-keep-alive   # a connection per request
+
+Scenarios:
+    fetch/<mode>/cold    fetch_anime_data with an empty cache directory
+    fetch/<mode>/warm    a second fetch_anime_data in the same process
+    board/<mode>/cold    MainWindow start-up with an empty cache, covers included
+    board/<mode>/warm    refresh_data on that window, covers included
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+FETCH_MODES = ("watching", "catalogue")
+RENDER_MODES = ("widgets", "delegate")
+
+def peak_rss_mib():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak / 1024 if sys.platform != "darwin" else peak / (1024 * 1024)
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+def server_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/_standin/stats") as response:
+        return json.load(response)
+
+def server_connections(base_url):
+    with urllib.request.urlopen(f"{base_url}/_standin/connections") as response:
+        return json.load(response)["connections"]
+
+def reset_server_stats(base_url):
+    urllib.request.urlopen(f"{base_url}/_standin/reset").close()
+
+def configure_client(base_url, cache_dir):
+    """Point every module at the stand-in and at a private cache directory."""
+    import cache
+    import covers
+    import snapshot
+    import transport
+    from auth import config, tokenrefresh
+
+    transport.set_base_url("mal", f"{base_url}/v2")
+    transport.set_base_url("anilist", f"{base_url}/graphql")
+    transport.set_base_url("oauth", f"{base_url}/v1/oauth2")
+    config.USERNAME = "standin"
+    # A local daemon would serve the board from MAL instead of the stand-in
+    config.USE_DAEMON = False
+
+    cache.CACHE_DIR = cache_dir
+    covers.COVER_DIR = os.path.join(cache_dir, "covers")
+    snapshot.SNAPSHOT_PATH = os.path.join(cache_dir, "board.json")
+
+    tokens_path = os.path.join(cache_dir, "tokens.json")
+    cache.write_json_atomic(tokens_path, {
+        "access_token": "standin-access-0",
+        "refresh_token": "standin-refresh-0",
+        "expires_in": 2678400
+    })
+    tokenrefresh.token_manager.path = tokens_path
+    tokenrefresh.token_manager._tokens = None
+
+def measure(base_url, fn):
+    """Run fn and return (seconds, per-host stats, connections opened)."""
+    reset_server_stats(base_url)
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    # Less the connections of the two control requests
+    return seconds, server_stats(base_url), server_connections(base_url) - 2
+
+def run_fetch(base_url, mode, cache_dir):
+    import mal
+    configure_client(base_url, cache_dir)
+    results = []
+    for phase in ("cold", "warm"):
+        seconds, stats, connections = measure(base_url, lambda: mal.fetch_anime_data(mode=mode))
+        results.append({"scenario": f"fetch/{mode}/{phase}", "seconds": seconds, "hosts": stats,
+                        "connections": connections})
+    return results
+
+def run_board(base_url, mode, cache_dir):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtCore import QThreadPool
+    from PyQt6.QtWidgets import QApplication
+
+    from auth import config
+    configure_client(base_url, cache_dir)
+    config.RENDER_MODE = mode
+    import wallpaper
+
+    app = QApplication([])
+    with open(os.path.join(ROOT, "style.qss"), "r") as f:
+        app.setStyleSheet(f.read())
+
+    def settle(window):
+        # Wait for background cover loads and deliver their results
+        while True:
+            QThreadPool.globalInstance().waitForDone()
+            app.processEvents()
+            if QThreadPool.globalInstance().activeThreadCount() == 0:
+                break
+        window.grab()
+
+    holder = {}
+
+    def cold():
+        holder["window"] = wallpaper.MainWindow()
+        holder["window"].resize(1600, 900)
+        holder["window"].show()
+        settle(holder["window"])
+
+    def warm():
+        holder["window"].refresh_data()
+        settle(holder["window"])
+
+    results = []
+    for phase, fn in (("cold", cold), ("warm", warm)):
+        seconds, stats, connections = measure(base_url, fn)
+        results.append({"scenario": f"board/{mode}/{phase}", "seconds": seconds, "hosts": stats,
+                        "connections": connections})
+    return results
+
+def run_child(args):
+    from auth import config
+    config.HTTP_KEEP_ALIVE = not args.no_keep_alive
+    cache_dir = tempfile.mkdtemp(prefix="mal-bench-")
+    if args.kind == "fetch":
+        results = run_fetch(args.base_url, args.mode, cache_dir)
+    else:
+        results = run_board(args.base_url, args.mode, cache_dir)
+    peak = peak_rss_mib()
+    for result in results:
+        result["peak_rss_mib"] = peak
+        print(json.dumps(result))
+
+def parse_rate_limits(values):
+    limits = {}
+    for value in values or []:
+        host, spec = value.split("=")
+        count, window = spec.split("/")
+        limits[host] = (int(count), float(window))
+    return limits
+
+def totals(hosts):
+    return (
+        sum(h["requests"] for h in hosts.values()),
+        sum(h["bytes"] for h in hosts.values()),
+        sum(count for h in hosts.values() for status, count in h["status"].items() if int(status) >= 400)
+    )
+
+def print_result(result, baseline=None):
+    requests, size, errors = totals(result["hosts"])
+    line = (f"{result['scenario']:<24} {result['size']:>5} {result['seconds'] * 1000:>9.1f} "
+            f"{requests:>8} {result['connections']:>6} {size / 1024:>9.1f} {errors:>6} {result['peak_rss_mib']:>8.1f}")
+    if baseline:
+        base_requests = totals(baseline["hosts"])[0]
+        line += (f"   {(result['seconds'] / baseline['seconds'] - 1) * 100:>+6.1f}% time"
+                 f" {requests - base_requests:>+5} req")
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 30, 100], help="watching list sizes")
+    parser.add_argument("--catalogue-size", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--connect-latency", type=float, default=0.0,
+                        help="seconds added to every new connection, for TCP and TLS setup")
+    parser.add_argument("--no-keep-alive", action="store_true", help="open a new connection for every request")
+    parser.add_argument("--expire-token-after", type=int, help="invalidate the access token after N MAL requests")
+    parser.add_argument("--rate-limit", action="append", metavar="HOST=N/SECONDS",
+                        help="return 429 above N requests per window for mal, anilist, cdn or oauth")
+    parser.add_argument("--scenarios", nargs="+", default=["fetch", "board"], choices=["fetch", "board"])
+    parser.add_argument("--json", help="append results as JSON lines to this file")
+    parser.add_argument("--compare", help="JSON lines file from an earlier --json run")
+    parser.add_argument("--child", nargs=3, metavar=("KIND", "MODE", "BASE_URL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.kind, args.mode, args.base_url = args.child
+        run_child(args)
+        return
+
+    from standin import StandIn, make_fixtures
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            for line in f:
+                result = json.loads(line)
+                baseline[(result["scenario"], result["size"])] = result
+
+    print(f"{'scenario':<24} {'size':>5} {'wall ms':>9} {'requests':>8} {'conns':>6} {'KiB':>9} {'errors':>6} {'peak MiB':>8}")
+    output = open(args.json, "a", encoding="utf-8") if args.json else None
+    try:
+        for size in args.sizes:
+            standin = StandIn(
+                make_fixtures(list_size=size, catalogue_size=args.catalogue_size),
+                latency=args.latency,
+                connect_latency=args.connect_latency,
+                expire_token_after=args.expire_token_after,
+                rate_limits=parse_rate_limits(args.rate_limit)
+            ).start()
+            try:
+                jobs = []
+                if "fetch" in args.scenarios:
+                    jobs.extend(("fetch", mode) for mode in FETCH_MODES)
+                if "board" in args.scenarios:
+                    jobs.extend(("board", mode) for mode in RENDER_MODES)
+                for kind, mode in jobs:
+                    command = [sys.executable, os.path.abspath(__file__), "--child", kind, mode, standin.base_url]
+                    if args.no_keep_alive:
+                        command.append("--no-keep-alive")
+                    completed = subprocess.run(
+                        command,
+                        capture_output=True, text=True
+                    )
+                    if completed.returncode != 0:
+                        print(f"{kind}/{mode} failed:\n{completed.stderr}")
+                        continue
+                    for line in completed.stdout.splitlines():
+                        if not line.startswith("{"):
+                            continue
+                        result = json.loads(line)
+                        result["size"] = size
+                        result["latency"] = args.latency
+                        result["keep_alive"] = not args.no_keep_alive
+                        print_result(result, baseline.get((result["scenario"], size)))
+                        if output:
+                            output.write(json.dumps(result) + "\n")
+            finally:
+                standin.stop()
+    finally:
+        if output:
+            output.close()
+
+if __name__ == "__main__":
+    main()
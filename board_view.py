@@ -0,0 +1,240 @@
+from PyQt6.QtCore import (
+    QAbstractListModel, QEvent, QModelIndex, QRect, QSize, QSortFilterProxyModel, Qt
+)
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QImage, QPixmap
+from PyQt6.QtWidgets import QListView, QStyledItemDelegate
+
+import covers
+from tasks import start_task
+
+EntryRole = Qt.ItemDataRole.UserRole + 1
+WeekdayRole = Qt.ItemDataRole.UserRole + 2
+
+CARD_WIDTH = 168
+CARD_HEIGHT = 320
+BUTTON_HEIGHT = 24
+BUTTON_WIDTH = 52
+TEXT_HEIGHT = 24
+
+class AnimeListModel(QAbstractListModel):
+    """One flat model of every board entry, shared by all day columns.
+
+    Refreshes are reconciled by MAL ID: rows whose data changed emit
+    dataChanged and are repainted on their own, and the model is only
+    reset when titles appear, disappear or move.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries = []
+        self.rows_by_id = {}
+        # Local +/- edits not submitted with "=" yet: mal_id -> (watched_eps they started from, eps)
+        self.local_eps = {}
+        self.loading_covers = set()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        anime = self.entries[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return anime["title"]
+        if role == EntryRole:
+            return anime
+        if role == WeekdayRole:
+            return anime["weekday_idx"]
+        return None
+
+    def set_entries(self, anime_by_day):
+        entries = [anime for anime_list in anime_by_day for anime in anime_list]
+        old_ids = [anime["mal_id"] for anime in self.entries]
+        new_ids = [anime["mal_id"] for anime in entries]
+        stats = {
+            "reused": len(set(old_ids) & set(new_ids)),
+            "created": len(set(new_ids) - set(old_ids)),
+            "removed": len(set(old_ids) - set(new_ids))
+        }
+
+        if old_ids == new_ids and all(
+            old["weekday_idx"] == new["weekday_idx"] for old, new in zip(self.entries, entries)
+        ):
+            changed = [row for row, (old, new) in enumerate(zip(self.entries, entries)) if old != new]
+            self.entries = entries
+            for row in changed:
+                self.dataChanged.emit(self.index(row), self.index(row))
+        else:
+            self.beginResetModel()
+            self.entries = entries
+            self.rows_by_id = {mal_id: row for row, mal_id in enumerate(new_ids)}
+            self.local_eps = {
+                mal_id: eps for mal_id, eps in self.local_eps.items() if mal_id in self.rows_by_id
+            }
+            self.endResetModel()
+        return stats
+
+    def update_entry(self, anime):
+        row = self.rows_by_id.get(anime["mal_id"])
+        if row is None:
+            return
+        self.entries[row] = anime
+        self.dataChanged.emit(self.index(row), self.index(row))
+
+    def current_eps(self, anime):
+        # An edit is dropped once the confirmed count it was based on changes
+        base_eps, eps = self.local_eps.get(anime["mal_id"], (None, None))
+        return eps if base_eps == anime["watched_eps"] else anime["watched_eps"]
+
+    def step_eps(self, anime, step):
+        eps = self.current_eps(anime) + step
+        total = anime["total_eps"] if isinstance(anime["total_eps"], int) else None
+        if eps < 0 or (total is not None and eps > total):
+            return
+        self.local_eps[anime["mal_id"]] = (anime["watched_eps"], eps)
+        row = self.rows_by_id[anime["mal_id"]]
+        self.dataChanged.emit(self.index(row), self.index(row))
+
+    def cover_for(self, anime):
+        """Return the cached cover pixmap, starting a background load on a miss."""
+        url = anime.get("cover_url")
+        if not url:
+            return None
+        pixmap = covers.cached_pixmap(url)
+        if pixmap is None and url not in self.loading_covers:
+            self.loading_covers.add(url)
+            start_task(
+                covers.load_cover_image, url,
+                on_result=lambda image: self.on_cover_loaded(url, image),
+                on_error=lambda e: self.on_cover_failed(url, e)
+            )
+        return pixmap
+
+    def on_cover_loaded(self, url, image):
+        covers.store_pixmap(url, QPixmap.fromImage(image))
+        self.loading_covers.discard(url)
+        for row, anime in enumerate(self.entries):
+            if anime.get("cover_url") == url:
+                self.dataChanged.emit(self.index(row), self.index(row))
+
+    def on_cover_failed(self, url, error):
+        # Leave url in loading_covers so a broken cover is not retried on every paint
+        print(f"Failed to load image {url}: {error}")
+
+class DayFilterModel(QSortFilterProxyModel):
+    """Rows of the shared model that air on one weekday."""
+    def __init__(self, weekday_idx, parent=None):
+        super().__init__(parent)
+        self.weekday_idx = weekday_idx
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        index = self.sourceModel().index(source_row, 0, source_parent)
+        return self.sourceModel().data(index, WeekdayRole) == self.weekday_idx
+
+def card_rects(rect):
+    """Cover, button bar, its three buttons and the three text lines of a card painted in rect."""
+    left = rect.x() + (rect.width() - 160) // 2
+    cover = QRect(left, rect.y() + 4, 160, 224)
+    bar = QRect(left, cover.bottom() + 5, 160, BUTTON_HEIGHT)
+    buttons = [QRect(bar.x() + 2 + i * BUTTON_WIDTH, bar.y(), BUTTON_WIDTH, BUTTON_HEIGHT) for i in range(3)]
+    text_top = bar.bottom() + 5
+    lines = [QRect(rect.x(), text_top + i * TEXT_HEIGHT, rect.width(), TEXT_HEIGHT) for i in range(3)]
+    return cover, bar, buttons, lines
+
+def paint_card(painter, rect, anime, cover_image, watched_eps, font, buttons=True):
+    """Paint one card (cover, -/=/+ bar, title, episodes, countdown) into rect.
+
+    cover_image may be a QPixmap, a QImage or None. Without buttons the bar
+    is left out, for images that cannot be clicked.
+    """
+    cover, bar, button_rects, lines = card_rects(rect)
+    painter.save()
+
+    if cover_image is not None:
+        target = QRect(0, 0, cover_image.width(), cover_image.height())
+        target.moveCenter(cover.center())
+        if isinstance(cover_image, QImage):
+            painter.drawImage(target, cover_image)
+        else:
+            painter.drawPixmap(target, cover_image)
+    else:
+        painter.fillRect(cover, QColor("#1e1e1e"))
+
+    font = QFont(font)
+    font.setBold(True)
+    font.setPointSize(14)
+    painter.setFont(font)
+    if buttons:
+        painter.fillRect(bar, QColor(0, 0, 0, 128))
+        painter.setPen(QColor("#ffffff"))
+        for button_rect, text in zip(button_rects, ("-", "=", "+")):
+            painter.drawText(button_rect, Qt.AlignmentFlag.AlignCenter, text)
+
+    title_rect, eps_rect, countdown_rect = lines
+    metrics = QFontMetrics(font)
+    title = metrics.elidedText(anime["title"], Qt.TextElideMode.ElideRight, title_rect.width())
+    painter.setPen(QColor("lime" if anime["status"] == "GREEN" else "tomato"))
+    painter.drawText(title_rect, Qt.AlignmentFlag.AlignCenter, title)
+
+    painter.setPen(QColor("#ffffff"))
+    total = anime["total_eps"] if anime["total_eps"] else "?"
+    painter.drawText(eps_rect, Qt.AlignmentFlag.AlignCenter, f"{watched_eps}/{total} episodes")
+    painter.drawText(countdown_rect, Qt.AlignmentFlag.AlignCenter, countdown_text(anime.get("next_in_hours")))
+
+    painter.restore()
+
+def countdown_text(hours):
+    return f"Next in {hours // 24}d {hours % 24}h" if hours is not None else "Next: ?"
+
+class AnimeCardDelegate(QStyledItemDelegate):
+    """Paints a card (cover, -/=/+ bar, title, episodes, countdown) and handles its buttons."""
+    def __init__(self, model, on_submit, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.on_submit = on_submit
+
+    def sizeHint(self, option, index):
+        return QSize(CARD_WIDTH, CARD_HEIGHT)
+
+    def paint(self, painter, option, index):
+        anime = index.data(EntryRole)
+        if anime is None:
+            return
+        paint_card(painter, option.rect, anime, self.model.cover_for(anime), self.model.current_eps(anime), option.font)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QEvent.Type.MouseButtonRelease or event.button() != Qt.MouseButton.LeftButton:
+            return False
+        anime = index.data(EntryRole)
+        _, _, buttons, _ = card_rects(option.rect)
+        pos = event.position().toPoint()
+        if buttons[0].contains(pos):
+            self.model.step_eps(anime, -1)
+        elif buttons[1].contains(pos):
+            self.on_submit(anime["mal_id"], self.model.current_eps(anime))
+        elif buttons[2].contains(pos):
+            self.model.step_eps(anime, 1)
+        else:
+            return False
+        return True
+
+def make_day_view(model, delegate, weekday_idx, parent=None):
+    """A virtualized QListView showing one weekday of the shared model.
+
+    Sunday wraps into two columns, like the QGridLayout of the widget board.
+    """
+    proxy = DayFilterModel(weekday_idx, parent)
+    proxy.setSourceModel(model)
+    view = QListView(parent)
+    view.setModel(proxy)
+    view.setItemDelegate(delegate)
+    view.setUniformItemSizes(True)
+    view.setSelectionMode(QListView.SelectionMode.NoSelection)
+    view.setSpacing(6)
+    view.setMouseTracking(True)
+    view.setCursor(Qt.CursorShape.PointingHandCursor)
+    if weekday_idx == 0:
+        view.setFlow(QListView.Flow.LeftToRight)
+        view.setWrapping(True)
+        view.setResizeMode(QListView.ResizeMode.Adjust)
+        view.setMinimumWidth(2 * (CARD_WIDTH + 2 * view.spacing()) + view.verticalScrollBar().sizeHint().width() + 4)
+    return view
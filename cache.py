@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+def write_json_atomic(path, data):
+    """Write JSON to path via a temp file so readers never see a partial file."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def load_versioned_json(path, version, what, parse):
+    """parse(data) for the JSON file at path, or None if it is missing or of another version.
+
+    Malformed content, including whatever parse raises on it, is reported
+    as an unreadable what and also returns None.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != version:
+            return None
+        return parse(data)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        print(f"Ignoring unreadable {what}: {e}")
+        return None
+
+def save_versioned_json(path, version, what, data):
+    """Atomically write data with its version to path; False, after reporting it, if that failed."""
+    try:
+        write_json_atomic(path, {"version": version, **data})
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Failed to save {what}: {e}")
+        return False
+
+def cache_key(url, params=None):
+    raw = json.dumps([url, sorted((params or {}).items())], default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def entry_path(key):
+    return os.path.join(CACHE_DIR, "responses", f"{key}.json")
+
+def load_entry(key):
+    """Return a cached response entry, or None if missing or unreadable."""
+    try:
+        with open(entry_path(key), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache entry {key}: {e}")
+        return None
+
+def save_entry(key, data, etag=None, last_modified=None):
+    entry = {
+        "fetched_at": time.time(),
+        "etag": etag,
+        "last_modified": last_modified,
+        "data": data
+    }
+    try:
+        write_json_atomic(entry_path(key), entry)
+    except OSError as e:
+        print(f"Failed to write cache entry {key}: {e}")
+    return entry
+
+def is_fresh(entry, ttl):
+    return entry is not None and time.time() - entry.get("fetched_at", 0) < ttl
+
+def touch_entry(key, entry):
+    """Mark a revalidated entry as fresh again."""
+    return save_entry(key, entry["data"], entry.get("etag"), entry.get("last_modified"))
@@ -0,0 +1,90 @@
+import os
+import time
+
+import cache
+
+INDEX_VERSION = 1
+
+# Node fields kept per title
+NODE_KEYS = ("id", "title", "broadcast", "num_episodes", "status", "start_season", "main_picture")
+
+def index_path():
+    return os.path.join(cache.CACHE_DIR, "catalogue.json")
+
+def season_key(season, year):
+    return f"{year}/{season}"
+
+class CatalogueIndex:
+    """Persistent mal_id -> anime node index built up one season at a time.
+
+    Seasons are recorded with the time they were fetched; a season fetched
+    after it ended is closed and never fetched again. Titles can also be
+    added one by one, for shows that started before any indexed season.
+    """
+    def __init__(self, path=None):
+        self.path = path or index_path()
+        self.seasons = {}
+        self.anime = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path=None):
+        index = cls(path)
+        loaded = cache.load_versioned_json(index.path, INDEX_VERSION, "catalogue index", lambda data: (
+            data["seasons"], {int(mal_id): record for mal_id, record in data["anime"].items()}))
+        if loaded is not None:
+            index.seasons, index.anime = loaded
+        return index
+
+    def save(self):
+        if not self.dirty:
+            return
+        if cache.save_versioned_json(self.path, INDEX_VERSION, "catalogue index",
+                                     {"seasons": self.seasons, "anime": self.anime}):
+            self.dirty = False
+
+    def get(self, mal_id):
+        record = self.anime.get(mal_id)
+        return record["node"] if record else None
+
+    def add(self, nodes, now=None):
+        """Add or update nodes, remembering when each was last fetched."""
+        now = time.time() if now is None else now
+        for node in nodes:
+            node = {key: node[key] for key in NODE_KEYS if key in node}
+            old = self.anime.get(node["id"])
+            if old is None or old["node"] != node:
+                self.dirty = True
+            self.anime[node["id"]] = {"node": node, "fetched_at": now}
+
+    def is_stale(self, mal_id, ttl, now=None):
+        """True if mal_id is unknown, or still airing and not fetched within ttl."""
+        record = self.anime.get(mal_id)
+        if record is None:
+            return True
+        if record["node"].get("status") == "finished_airing":
+            return False
+        now = time.time() if now is None else now
+        return now - record["fetched_at"] >= ttl
+
+    def season_closed(self, season, year):
+        return self.seasons.get(season_key(season, year), {}).get("closed", False)
+
+    def mark_season(self, season, year, closed, now=None):
+        self.seasons[season_key(season, year)] = {
+            "fetched_at": time.time() if now is None else now,
+            "closed": closed
+        }
+        self.dirty = True
+
+    def prune(self, seasons, keep_ids):
+        """Drop seasons not listed and titles outside them, except keep_ids."""
+        keys = {season_key(season, year) for season, year in seasons}
+        for key in [key for key in self.seasons if key not in keys]:
+            del self.seasons[key]
+            self.dirty = True
+        for mal_id in list(self.anime):
+            start = self.anime[mal_id]["node"].get("start_season") or {}
+            if mal_id not in keep_ids and season_key(start.get("season"), start.get("year")) not in keys:
+                del self.anime[mal_id]
+                self.dirty = True
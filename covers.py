@@ -0,0 +1,134 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, Qt
+from PyQt6.QtGui import QImageReader, QPixmap
+
+import cache
+import ratelimit
+import tracing
+from auth import config
+
+COVER_WIDTH = 160
+COVER_HEIGHT = 224
+COVER_DIR = os.path.join(cache.CACHE_DIR, "covers")
+
+_disk_lock = threading.Lock()
+_pixmaps = OrderedDict()
+
+def cover_path(url):
+    return os.path.join(COVER_DIR, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+def read_cover_bytes(url):
+    """Return cached image bytes for url, marking the file as recently used."""
+    path = cover_path(url)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+def store_cover_bytes(url, data):
+    os.makedirs(COVER_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=COVER_DIR, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, cover_path(url))
+    except OSError as e:
+        print(f"Failed to cache cover {url}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return
+    evict_covers(getattr(config, "COVER_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
+def evict_covers(max_bytes):
+    """Delete least recently used covers until the store fits in max_bytes."""
+    with _disk_lock:
+        files = []
+        total = 0
+        try:
+            names = os.listdir(COVER_DIR)
+        except OSError:
+            return
+        for name in names:
+            if name.startswith(".tmp-"):
+                continue
+            path = os.path.join(COVER_DIR, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+def fetch_cover_bytes(url):
+    """Return image bytes for url from the disk store, downloading on a miss."""
+    data = read_cover_bytes(url)
+    if data is not None:
+        tracing.annotate(cache="hit")
+        return data
+    tracing.annotate(cache="miss")
+    response = ratelimit.request("GET", url)
+    response.raise_for_status()
+    store_cover_bytes(url, response.content)
+    return response.content
+
+def cached_pixmap(url):
+    pixmap = _pixmaps.get(url)
+    if pixmap is not None:
+        _pixmaps.move_to_end(url)
+    return pixmap
+
+def store_pixmap(url, pixmap):
+    _pixmaps[url] = pixmap
+    _pixmaps.move_to_end(url)
+    while len(_pixmaps) > getattr(config, "COVER_MEMORY_ITEMS", 256):
+        _pixmaps.popitem(last=False)
+
+def decode_cover(data):
+    """Decode image bytes straight to the card size. Safe to call off the GUI thread."""
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    reader = QImageReader(buffer)
+    size = reader.size()
+    if size.isValid():
+        reader.setScaledSize(size.scaled(COVER_WIDTH, COVER_HEIGHT, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(f"could not decode image: {reader.errorString()}")
+    return image
+
+def load_cover_image(url):
+    """Fetch and decode the cover for url. Safe to call off the GUI thread."""
+    with tracing.span("cover.load"):
+        return decode_cover(fetch_cover_bytes(url))
+
+def load_cover_pixmap(url):
+    """Return the cover for url scaled to the card size, using both cache levels."""
+    pixmap = cached_pixmap(url)
+    if pixmap is not None:
+        return pixmap
+    pixmap = QPixmap.fromImage(load_cover_image(url))
+    store_pixmap(url, pixmap)
+    return pixmap
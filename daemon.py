@@ -0,0 +1,333 @@
+"""Headless board daemon: one process fetches, every client reads.
+
+    python mal.py --daemon
+
+The daemon owns fetching, the caches and token refresh, and serves the
+computed board on loopback HTTP:
+
+    GET  /board                        board JSON with an ETag; 304 on If-None-Match
+    GET  /board?wait=50                long-poll: held until the board changes
+    POST /refresh {"force": false}     fetch now (shared with concurrent callers)
+    POST /anime/<id>/my_list_status    write a list status change to MAL
+
+It refetches every DAEMON_REFRESH_MINUTES and shortly after each tracked
+episode airs. Clients use DaemonClient and fall back to fetching in-process
+when nothing is listening.
+
+Every request must carry the per-install secret from auth/daemon_secret in
+an X-Daemon-Secret header, and POST bodies must be application/json.
+Requests with an Origin header or a Host other than the loopback address
+are refused, so web pages cannot reach the daemon through the browser,
+not even with DNS rebinding.
+"""
+import copy
+import hmac
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import mal
+import transport
+from auth import config
+
+SECRET_PATH = os.path.join(os.path.dirname(os.path.abspath(config.__file__)), "daemon_secret")
+SECRET_HEADER = "X-Daemon-Secret"
+
+_secret = None
+
+def daemon_url():
+    return f"http://127.0.0.1:{getattr(config, 'DAEMON_PORT', 47615)}"
+
+def daemon_secret():
+    """The secret shared by the daemon and its clients, created on first use."""
+    global _secret
+    if _secret is None:
+        try:
+            fd = os.open(SECRET_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            with open(SECRET_PATH, "r", encoding="utf-8") as f:
+                _secret = f.read().strip()
+        else:
+            _secret = secrets.token_urlsafe(32)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(_secret)
+    return _secret
+
+class BoardDaemon:
+    """The shared board, its version, and the refresh schedule."""
+    def __init__(self):
+        self.anime_by_day = None
+        self.version = 0
+        self.fetched_at = 0.0
+        self.refreshing = False
+        self.refreshing_forced = False
+        # A forced refresh asked for while an unforced fetch was running
+        self.force_pending = False
+        # What the last fetch raised, re-raised to the callers that waited on it
+        self.error = None
+        self.cond = threading.Condition()
+
+    @property
+    def etag(self):
+        return f'"{self.version}"'
+
+    def body(self):
+        with self.cond:
+            return {"version": self.version, "fetched_at": self.fetched_at, "anime_by_day": self.anime_by_day}
+
+    def refresh(self, force=False, max_age=None):
+        """Fetch the board unless one was fetched within max_age seconds. Concurrent calls share one fetch.
+
+        A forced call arriving during an unforced fetch is not satisfied by
+        it: once it finishes, one forced fetch runs for all such callers.
+        Callers that waited on a fetch that failed get its exception.
+        """
+        with self.cond:
+            if self.refreshing:
+                if force and not self.refreshing_forced:
+                    self.force_pending = True
+                self.cond.wait_for(lambda: not self.refreshing)
+                if not (force and self.force_pending):
+                    if self.error is not None:
+                        raise self.error
+                    return
+            else:
+                if max_age is None:
+                    max_age = getattr(config, "DAEMON_MIN_AGE", 60)
+                if not force and self.anime_by_day is not None and time.time() - self.fetched_at < max_age:
+                    return
+            if force:
+                self.force_pending = False
+            self.refreshing = True
+            self.refreshing_forced = force
+            self.error = None
+        try:
+            anime_by_day = mal.fetch_anime_data(force_refresh=force)
+            self.publish(anime_by_day)
+        except Exception as e:
+            with self.cond:
+                self.error = e
+            raise
+        finally:
+            with self.cond:
+                self.refreshing = False
+                self.cond.notify_all()
+
+    def publish(self, anime_by_day):
+        with self.cond:
+            self.fetched_at = time.time()
+            if anime_by_day != self.anime_by_day:
+                self.anime_by_day = anime_by_day
+                self.version += 1
+            self.cond.notify_all()
+
+    def wait_for_change(self, etag, timeout):
+        with self.cond:
+            self.cond.wait_for(lambda: self.etag != etag, timeout)
+
+    def apply_update(self, anime_id, list_status):
+        """Reflect a confirmed write in the board so every client sees it."""
+        with self.cond:
+            if self.anime_by_day is None or not list_status:
+                return
+            anime_by_day = copy.deepcopy(self.anime_by_day)
+            for anime_list in anime_by_day:
+                for anime in list(anime_list):
+                    if anime["mal_id"] != anime_id:
+                        continue
+                    if list_status.get("status") != "watching":
+                        anime_list.remove(anime)
+                        continue
+                    anime["score"] = list_status.get("score", anime["score"])
+                    anime["watched_eps"] = list_status.get("num_episodes_watched", anime["watched_eps"])
+                    anime["status"] = mal.entry_status(anime)
+            if anime_by_day != self.anime_by_day:
+                self.anime_by_day = anime_by_day
+                self.version += 1
+                self.cond.notify_all()
+
+    def next_refresh_delay(self, now=None):
+        """Seconds until the next periodic or post-airing refresh."""
+        now = time.time() if now is None else now
+        due = [self.fetched_at + getattr(config, "DAEMON_REFRESH_MINUTES", 30) * 60]
+        delay = getattr(config, "AIRING_REFRESH_DELAY", 5 * 60)
+        retry = getattr(config, "AIRING_RETRY_INTERVAL", 15 * 60)
+        for anime_list in self.anime_by_day or []:
+            for anime in anime_list:
+                if anime.get("airing_at") is None:
+                    continue
+                airing_due = anime["airing_at"] + delay
+                # Still showing an aired episode after a post-airing fetch: AniList lags, retry later
+                due.append(airing_due if airing_due > self.fetched_at else self.fetched_at + retry)
+        return max(0.0, min(due) - now)
+
+    def run_schedule(self):
+        while True:
+            with self.cond:
+                delay = self.next_refresh_delay()
+                if delay > 0:
+                    self.cond.wait(delay)
+                    continue
+            try:
+                self.refresh(max_age=0)
+            except Exception as e:
+                print(f"Scheduled refresh failed: {e}")
+                time.sleep(getattr(config, "AIRING_RETRY_INTERVAL", 15 * 60))
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    board = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, data=None, etag=None):
+        body = json.dumps(data).encode("utf-8") if data is not None else b""
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def refuse(self):
+        """Send an error and return True unless the request comes from a client holding the secret."""
+        port = self.server.server_address[1]
+        if "Origin" in self.headers:
+            self.send_json(403, {"error": "cross-origin requests are not allowed"})
+        elif self.headers.get("Host") not in (f"127.0.0.1:{port}", f"localhost:{port}"):
+            self.send_json(403, {"error": "unexpected Host"})
+        elif not hmac.compare_digest(self.headers.get(SECRET_HEADER, "").encode(), daemon_secret().encode()):
+            self.send_json(403, {"error": "missing or wrong daemon secret"})
+        elif self.command == "POST" and self.headers.get_content_type() != "application/json":
+            self.send_json(415, {"error": "expected application/json"})
+        else:
+            return False
+        return True
+
+    def do_GET(self):
+        if self.refuse():
+            return
+        path, _, query = self.path.partition("?")
+        if path != "/board":
+            self.send_json(404, {"error": "not found"})
+            return
+        match = re.search(r"(?:^|&)wait=(\d+)", query)
+        etag = self.headers.get("If-None-Match")
+        if match and etag == self.board.etag:
+            self.board.wait_for_change(etag, min(int(match.group(1)), 300))
+        body = self.board.body()
+        if body["anime_by_day"] is None:
+            self.send_json(503, {"error": "no board fetched yet"})
+        elif etag == f'"{body["version"]}"':
+            self.send_json(304, etag=etag)
+        else:
+            self.send_json(200, body, etag=f'"{body["version"]}"')
+
+    def do_POST(self):
+        if self.refuse():
+            return
+        try:
+            data = self.read_json()
+            if self.path == "/refresh":
+                self.board.refresh(force=bool(data.get("force")))
+                body = self.board.body()
+                if body["anime_by_day"] is None:
+                    self.send_json(503, {"error": "no board fetched yet"})
+                else:
+                    self.send_json(200, body, etag=f'"{body["version"]}"')
+                return
+            match = re.fullmatch(r"/anime/(\d+)/my_list_status", self.path)
+            if not match:
+                self.send_json(404, {"error": "not found"})
+                return
+            anime_id = int(match.group(1))
+            _, list_status = mal.submit_update(anime_id, data, getattr(config, "UPDATE_RETRIES", 3))
+            self.board.apply_update(anime_id, list_status)
+            self.send_json(200, {"id": anime_id, "my_list_status": list_status})
+        except Exception as e:
+            self.send_json(502, {"error": str(e)})
+
+def serve():
+    board = BoardDaemon()
+
+    class Handler(DaemonHandler):
+        pass
+    Handler.board = board
+
+    daemon_secret()  # Created before any client can ask for it
+    port = getattr(config, "DAEMON_PORT", 47615)
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    print(f"Serving the board on {daemon_url()}")
+    # The schedule fetches straight away, since nothing has been fetched yet
+    threading.Thread(target=board.run_schedule, daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+class DaemonError(Exception):
+    pass
+
+class DaemonClient:
+    """Talks to a running daemon. Raises requests.ConnectionError when none is listening."""
+    def __init__(self, url=None):
+        self.url = url or daemon_url()
+        self.headers = {SECRET_HEADER: daemon_secret()}
+        self.etag = None
+        self.anime_by_day = None
+        self.lock = threading.Lock()
+
+    def accept(self, response):
+        """Remember a board response and return a private copy of the board, or None if unchanged."""
+        if response.status_code == 304:
+            return None
+        if response.status_code != 200:
+            raise DaemonError(f"daemon answered {response.status_code}: {response.text}")
+        anime_by_day = response.json()["anime_by_day"]
+        if anime_by_day is None:
+            raise DaemonError("daemon has no board")
+        with self.lock:
+            self.etag = response.headers.get("ETag")
+            self.anime_by_day = anime_by_day
+        return copy.deepcopy(anime_by_day)
+
+    def get_board(self):
+        """The daemon's current board, without asking it to fetch."""
+        response = transport.send("GET", f"{self.url}/board", headers=self.headers, timeout=5)
+        return self.accept(response)
+
+    def refresh(self, force=False):
+        """Have the daemon fetch (or reuse a board fetched moments ago) and return the board."""
+        response = transport.send("POST", f"{self.url}/refresh", json={"force": force}, headers=self.headers,
+                                  timeout=300)
+        return self.accept(response)
+
+    def wait_for_change(self, timeout):
+        """Long-poll for a board newer than the last one seen. Returns None if nothing changed."""
+        headers = dict(self.headers)
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        response = transport.send("GET", f"{self.url}/board", params={"wait": int(timeout)}, headers=headers,
+                                  timeout=timeout + 10)
+        return self.accept(response)
+
+    def submit_update(self, anime_id, payload, attempts=None):
+        """Write a list status change through the daemon. Same result as mal.submit_update."""
+        response = transport.send("POST", f"{self.url}/anime/{anime_id}/my_list_status", json=payload,
+                                  headers=self.headers, timeout=120)
+        if response.status_code != 200:
+            raise DaemonError(response.json().get("error", f"daemon answered {response.status_code}"))
+        return anime_id, response.json()["my_list_status"]
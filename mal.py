@@ -1,28 +1,41 @@
-import requests
-import json
 import datetime
-from zoneinfo import ZoneInfo
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from auth import config
-from auth.tokenrefresh import refresh_token, load_tokens
+import cache
+import ratelimit
+from catalogue import CatalogueIndex, season_key
+import timeline
+from timeline import AiringTimeline
+import tracing
+import transport
+from watchlist import WatchingList, updated_at
+from auth.tokenrefresh import token_manager
 
-def load_tokens():
-    with open("auth/tokens.json", "r") as f:
-        return json.load(f)
+def safe_request(url, headers=None, params=None, method="GET", data=None, priority=ratelimit.BACKGROUND,
+                 attempts=None):
+    """Make an authorized request; if 401, refresh token and retry once.
 
-def safe_get(url, headers, params=None):
-    """Make a GET request; if 401, refresh token and retry once."""
-    response = requests.get(url, headers=headers, params=params)
+    Other retries (429, 5xx, connection errors) happen in ratelimit.request,
+    up to attempts times.
+    """
+    headers = dict(headers or {})
+    access_token = token_manager.access_token()
+    headers["Authorization"] = f"Bearer {access_token}"
+    response = ratelimit.request(method, url, priority, attempts, headers=headers, params=params, data=data)
     if response.status_code == 401:
         # print("Refreshing token")
-        new_tokens = refresh_token()
+        new_tokens = token_manager.refresh(stale_token=access_token)
         if not new_tokens:
             raise Exception("Failed to refresh access token")
-        
-        tokens = load_tokens()
-        headers["Authorization"] = f"Bearer {tokens['access_token']}"
-        response = requests.get(url, headers=headers, params=params)
+
+        headers["Authorization"] = f"Bearer {new_tokens['access_token']}"
+        response = ratelimit.request(method, url, priority, attempts, headers=headers, params=params, data=data)
     response.raise_for_status()
-    return response.json()
+    return response
+
+def safe_get(url, headers=None, params=None):
+    return safe_request(url, headers, params).json()
 
 def get_current_season():
     now = datetime.datetime.now()
@@ -40,35 +53,244 @@ def get_current_season():
 
     return season, year
 
-def get_seasonal_anime(season, year, access_token):
-    url = f"https://api.myanimelist.net/v2/anime/season/{year}/{season}"
-    headers = {"Authorization": f"Bearer {access_token}"}
+SEASONS = ["winter", "spring", "summer", "fall"]
+
+def recent_seasons(season, year, count):
+    """The count seasons ending with (season, year), newest first."""
+    idx = SEASONS.index(season)
+    seasons = []
+    for _ in range(max(1, count)):
+        seasons.append((SEASONS[idx], year))
+        idx -= 1
+        if idx < 0:
+            idx = len(SEASONS) - 1
+            year -= 1
+    return seasons
+
+ANIME_NODE_FIELDS = "broadcast,num_episodes,status,start_season,main_picture"
+
+def iter_seasonal_pages(season, year, force_refresh=False, use_cache=True):
+    """Yield pages of the season catalogue, served from the on-disk cache when possible.
+
+    A cached catalogue younger than SEASONAL_CACHE_TTL is returned without any
+    request. An older one is revalidated with ETag/Last-Modified on the first
+    page. force_refresh skips the cached copy; use_cache=False neither reads
+    nor stores one.
+    """
+    url = transport.url("mal", f"/anime/season/{year}/{season}")
     params = {
         "limit": 300,
-        "fields": "broadcast,num_episodes,status,main_picture",
+        "fields": ANIME_NODE_FIELDS,
         "nsfw": True
     }
 
+    key = cache.cache_key(url, params)
+    entry = None if force_refresh or not use_cache else cache.load_entry(key)
+    if cache.is_fresh(entry, getattr(config, "SEASONAL_CACHE_TTL", 24 * 3600)):
+        tracing.annotate(cache="hit")
+        yield entry["data"]
+        return
+
+    request_headers = {}
+    if entry:
+        if entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    response = safe_request(url, request_headers, params)
+    if response.status_code == 304 and entry:
+        tracing.annotate(cache="revalidated")
+        cache.touch_entry(key, entry)
+        yield entry["data"]
+        return
+
+    tracing.annotate(cache="miss")
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
     seasonal = []
-    while url:
-        data = safe_get(url, headers, params)
+    while True:
+        data = response.json()
         seasonal.extend(data["data"])
+        yield data["data"]
         url = data.get("paging", {}).get("next")
+        if not url:
+            break
+        response = safe_request(url, params=params)
 
+    if use_cache:
+        cache.save_entry(key, seasonal, etag, last_modified)
+
+def get_seasonal_anime(season, year, force_refresh=False, use_cache=True):
+    seasonal = []
+    for page in iter_seasonal_pages(season, year, force_refresh, use_cache):
+        seasonal.extend(page)
     return seasonal
 
+def get_anime_details(anime_id):
+    """Fetch the catalogue node of a single title."""
+    return safe_get(transport.url("mal", f"/anime/{anime_id}"), params={"fields": ANIME_NODE_FIELDS})
+
+
+WATCHING_NODE_FIELDS = f"list_status{{updated_at}},{ANIME_NODE_FIELDS}"
+
+# Entries per request when fetching only what changed since the last sync
+WATCHING_SYNC_PAGE_SIZE = 10
 
-def get_watching_list(username, access_token):
-    url = f"https://api.myanimelist.net/v2/users/{username}/animelist"
+def iter_list_pages(username, fields, status="watching", sort=None, limit=300):
+    """Yield pages of the user's anime list, following paging.next."""
+    url = transport.url("mal", f"/users/{username}/animelist")
     params = {
-        "status": "watching",
-        "limit": 300,
-        "fields": "list_status",
+        "limit": limit,
+        "fields": fields,
         "nsfw": True
     }
-    headers = {"Authorization": f"Bearer {access_token}"}
-    data = safe_get(url, headers, params)
-    return data["data"]
+    if status:
+        params["status"] = status
+    if sort:
+        params["sort"] = sort
+    while url:
+        data = safe_get(url, params=params)
+        yield data["data"]
+        # The next link carries the query already
+        url = data.get("paging", {}).get("next")
+        params = None
+
+def get_watching_list(username, fields="list_status"):
+    watching_list = []
+    for page in iter_list_pages(username, fields):
+        watching_list.extend(page)
+    return watching_list
+
+def sync_watching_list(username, full=False):
+    """Bring the local copy of the watching list up to date and return it.
+
+    Normally only entries updated since the last sync are fetched: the whole
+    list, every status, newest first, stopping at the first entry older than
+    the copy, so a list that did not change costs one small request. A full
+    sync runs when full is set, for another user, or WATCHING_FULL_SYNC_HOURS
+    after the last one; it also catches titles deleted from the list and
+    catalogue changes such as a new broadcast slot, which leave updated_at
+    alone.
+    """
+    watching = WatchingList.load()
+    max_age = getattr(config, "WATCHING_FULL_SYNC_HOURS", 24) * 3600
+    with tracing.span("fetch.watching_list") as span:
+        if full or watching.needs_full_sync(username, WATCHING_NODE_FIELDS, max_age):
+            changed = watching.replace(username, WATCHING_NODE_FIELDS,
+                                       get_watching_list(username, WATCHING_NODE_FIELDS))
+            span.set(sync="full", changed=len(changed))
+        else:
+            changes = []
+            pages = iter_list_pages(username, WATCHING_NODE_FIELDS, status=None, sort="list_updated_at",
+                                    limit=WATCHING_SYNC_PAGE_SIZE)
+            for page in pages:
+                fresh = [item for item in page if updated_at(item) >= watching.watermark]
+                changes.extend(fresh)
+                if len(fresh) < len(page):
+                    break
+            changed = watching.apply_changes(changes)
+            span.set(sync="incremental", changed=len(changed))
+    watching.save()
+    return watching
+
+def get_my_list_status(anime_id):
+    """Fetch the user's list status for a single title."""
+    url = transport.url("mal", f"/anime/{anime_id}")
+    response = safe_request(url, params={"fields": "my_list_status"}, priority=ratelimit.INTERACTIVE)
+    return response.json().get("my_list_status")
+
+def update_my_list_status(anime_id, payload, attempts=None):
+    """Write a list status change for a single title and return MAL's copy of it."""
+    url = transport.url("mal", f"/anime/{anime_id}/my_list_status")
+    return safe_request(url, method="PUT", data=payload, priority=ratelimit.INTERACTIVE, attempts=attempts).json()
+
+def submit_update(anime_id, payload, attempts=None):
+    """PUT payload for anime_id, then read back MAL's list status.
+
+    Transient failures are retried by ratelimit.request, up to attempts
+    times (REQUEST_RETRIES by default), and nowhere else.
+    """
+    update_my_list_status(anime_id, payload, attempts)
+    return anime_id, get_my_list_status(anime_id)
+
+def compute_status(watched_eps, total_eps, next_episode):
+    """GREEN when every aired episode has been watched, RED otherwise."""
+    if next_episode is None:
+        return "GREEN" if (isinstance(total_eps, int) and watched_eps >= total_eps > 0) else "RED"
+    return "GREEN" if watched_eps >= next_episode - 1 else "RED"
+
+def countdown_hours(airing_at, now=None):
+    if airing_at is None:
+        return None
+    now = time.time() if now is None else now
+    return max(0, int((airing_at - now) // 3600))
+
+def entry_status(anime, now=None):
+    """Status of a board entry, counting an episode whose airing time has passed as aired."""
+    now = time.time() if now is None else now
+    schedule = anime.get("schedule")
+    if schedule:
+        return "GREEN" if anime["watched_eps"] >= timeline.aired_episode(schedule, now) else "RED"
+    next_episode = anime.get("next_episode")
+    airing_at = anime.get("airing_at")
+    if next_episode is not None and airing_at is not None and airing_at <= now:
+        next_episode += 1
+    return compute_status(anime["watched_eps"], anime["total_eps"], next_episode)
+
+def update_countdown(anime, now=None):
+    """Recompute an entry's next episode, countdown and status locally.
+
+    Entries with a schedule move on to the following episode once one airs;
+    others only count down to their stored airing time. Returns True if
+    anything changed.
+    """
+    now = time.time() if now is None else now
+    schedule = anime.get("schedule")
+    if schedule:
+        next_episode, airing_at = timeline.next_airing(schedule, now) or (None, None)
+    else:
+        next_episode, airing_at = anime.get("next_episode"), anime.get("airing_at")
+        if airing_at is None:
+            return False
+    fields = {
+        "next_episode": next_episode,
+        "airing_at": airing_at,
+        "next_in_hours": countdown_hours(airing_at, now) if airing_at is not None and airing_at > now else None,
+        "status": entry_status(anime, now)
+    }
+    if all(anime.get(key) == value for key, value in fields.items()):
+        return False
+    anime.update(fields)
+    return True
+
+def apply_airing_info(anime, anilist_info, now=None):
+    """Update an entry's next-episode fields from fresh AniList info.
+
+    Returns True if the info contradicts the entry's schedule, which is then
+    dropped until the next fetch resyncs it.
+    """
+    next_ep = anilist_info.get("nextAiringEpisode")
+    offset = anime.get("episode_offset", 0)
+    contradicted = False
+    if anime.get("schedule"):
+        now = time.time() if now is None else now
+        next_episode = (next_ep["episode"] + offset, next_ep["airingAt"]) if next_ep else None
+        if not timeline.shifted(anime["schedule"], next_episode, now):
+            update_countdown(anime, now)
+            return False
+        del anime["schedule"]
+        contradicted = True
+    if next_ep:
+        anime["next_episode"] = next_ep["episode"] + offset
+        anime["airing_at"] = next_ep["airingAt"]
+        anime["next_in_hours"] = countdown_hours(next_ep["airingAt"], now)
+    else:
+        anime["next_episode"] = None
+        anime["airing_at"] = None
+        anime["next_in_hours"] = None
+    anime["status"] = entry_status(anime, now)
+    return contradicted
 
 def get_weekday_index(day):
     order = ["sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
@@ -79,6 +301,7 @@ def query_anilist_by_mal_id(mal_id):
     query = '''
     query ($idMal: Int) {
       Media(idMal: $idMal, type: ANIME) {
+        id
         episodes
         nextAiringEpisode {
           episode
@@ -89,103 +312,503 @@ def query_anilist_by_mal_id(mal_id):
     }
     '''
     variables = {"idMal": mal_id}
-    response = requests.post("https://graphql.anilist.co", json={"query": query, "variables": variables})
+    response = ratelimit.request("POST", transport.url("anilist"), json={"query": query, "variables": variables})
     response.raise_for_status()
     return response.json()["data"]["Media"]
 
-def fetch_anime_data():
-    tokens = load_tokens()
-    access_token = tokens["access_token"]
-    username = config.USERNAME
+ANILIST_PAGE_SIZE = 50
 
-    JST = ZoneInfo("Asia/Tokyo")
-    now = datetime.datetime.now(tz=JST)
+def query_anilist_batch(mal_ids):
+    """Query AniList for many MAL IDs at once, returning {mal_id: info}."""
+    query = '''
+    query ($ids: [Int], $page: Int, $perPage: Int) {
+      Page(page: $page, perPage: $perPage) {
+        pageInfo {
+          hasNextPage
+        }
+        media(idMal_in: $ids, type: ANIME) {
+          id
+          idMal
+          episodes
+          nextAiringEpisode {
+            episode
+            airingAt
+            timeUntilAiring
+          }
+        }
+      }
+    }
+    '''
+    results = {}
+    page = 1
+    while True:
+        variables = {"ids": list(mal_ids), "page": page, "perPage": ANILIST_PAGE_SIZE}
+        response = ratelimit.request("POST", transport.url("anilist"), json={"query": query, "variables": variables})
+        response.raise_for_status()
+        data = response.json()["data"]["Page"]
+        for media in data["media"]:
+            if media.get("idMal") is not None:
+                results[media["idMal"]] = media
+        if not data["pageInfo"]["hasNextPage"]:
+            break
+        page += 1
+    return results
 
-    season, year = get_current_season()
-    seasonal_anime = get_seasonal_anime(season, year, access_token)
-    seasonal_ids = {entry["node"]["id"]: entry["node"] for entry in seasonal_anime}
+def resolve_anilist_info(mal_ids):
+    """Resolve AniList airing info for every MAL ID, batching where possible.
 
-    watching_list = get_watching_list(username, access_token)
-    anime_by_day = [[] for _ in range(7)]
+    IDs missing from a batched response fall back to a single-title query.
+    A chunk whose batch query fails is left unresolved until the next
+    refresh rather than queried title by title, since AniList is most
+    likely down or rate limiting. IDs that cannot be resolved are left
+    out of the result.
+    """
+    mal_ids = list(dict.fromkeys(mal_ids))
+    results = {}
+    missing = []
+    for i in range(0, len(mal_ids), ANILIST_PAGE_SIZE):
+        chunk = mal_ids[i:i + ANILIST_PAGE_SIZE]
+        try:
+            batch = query_anilist_batch(chunk)
+        except Exception as e:
+            print(f"AniList batch query for {len(chunk)} titles failed, leaving them unresolved: {e}")
+            continue
+        results.update(batch)
+        missing.extend(mal_id for mal_id in chunk if mal_id not in batch)
 
+    for mal_id in missing:
+        try:
+            media = query_anilist_by_mal_id(mal_id)
+        except Exception as e:
+            print(f"AniList query for {mal_id} failed: {e}")
+            continue
+        if media:
+            results[mal_id] = media
+    return results
+
+# Airing schedules are fetched for this many seconds either side of now
+TIMELINE_WINDOW = 16 * 7 * 24 * 3600
+
+def query_airing_schedules(media_ids, after, before):
+    """AniList airingSchedules rows for media_ids airing between after and before, every page."""
+    query = '''
+    query ($mediaIds: [Int], $after: Int, $before: Int, $page: Int, $perPage: Int) {
+      Page(page: $page, perPage: $perPage) {
+        pageInfo {
+          hasNextPage
+        }
+        airingSchedules(mediaId_in: $mediaIds, airingAt_greater: $after, airingAt_lesser: $before, sort: TIME) {
+          mediaId
+          episode
+          airingAt
+        }
+      }
+    }
+    '''
+    rows = []
+    page = 1
+    while True:
+        variables = {"mediaIds": list(media_ids), "after": int(after), "before": int(before),
+                     "page": page, "perPage": ANILIST_PAGE_SIZE}
+        response = ratelimit.request("POST", transport.url("anilist"), json={"query": query, "variables": variables})
+        response.raise_for_status()
+        data = response.json()["data"]["Page"]
+        rows.extend(data["airingSchedules"])
+        if not data["pageInfo"]["hasNextPage"]:
+            break
+        page += 1
+    return rows
+
+def episode_offset(mal_eps, anilist_eps):
+    """How far MAL's episode numbers run ahead of AniList's, e.g. for a second cour AniList counts from 1."""
+    if isinstance(mal_eps, int) and mal_eps > 0 and isinstance(anilist_eps, int) and anilist_eps > 0:
+        return mal_eps - anilist_eps
+    return 0
+
+def sync_timeline(airing_timeline, anilist_by_mal_id, nodes, now=None):
+    """Refetch the schedules of titles that have none yet or whose next episode moved.
+
+    The window reaches at least past every next episode, so a title on a
+    break longer than TIMELINE_WINDOW gets that episode in its schedule
+    and is not found stale again on every refresh.
+    """
+    now = time.time() if now is None else now
+    stale = {}
+    before = now + TIMELINE_WINDOW
+    for mal_id, media in anilist_by_mal_id.items():
+        node = nodes.get(mal_id) or {}
+        offset = episode_offset(node.get("num_episodes"), media.get("episodes"))
+        if media.get("id") is not None and airing_timeline.needs_sync(mal_id, media, offset, now):
+            stale[media["id"]] = (mal_id, offset)
+            next_ep = media.get("nextAiringEpisode")
+            if next_ep:
+                before = max(before, next_ep["airingAt"] + 1)
+    if not stale:
+        return
+    with tracing.span("fetch.timeline", titles=len(stale)):
+        rows = query_airing_schedules(stale, now - TIMELINE_WINDOW, before)
+    rows_by_media = {}
+    for row in rows:
+        rows_by_media.setdefault(row["mediaId"], []).append(row)
+    for media_id, (mal_id, offset) in stale.items():
+        airing_timeline.update(mal_id, media_id, offset, rows_by_media.get(media_id, []), now)
+
+def resolve_airing(mal_ids, nodes, airing_timeline):
+    """AniList info for mal_ids, with their schedules in airing_timeline brought up to date."""
+    anilist_by_mal_id = resolve_anilist_info(mal_ids)
+    try:
+        sync_timeline(airing_timeline, anilist_by_mal_id, nodes)
+    except Exception as e:
+        print(f"Failed to sync airing schedules: {e}")
+    return anilist_by_mal_id
+
+def airing_lookup_ids(watching_list, seasonal_ids):
+    """MAL IDs from the watching list that will need AniList airing info."""
+    ids = []
     for entry in watching_list:
         anime_id = entry["node"]["id"]
-        if anime_id not in seasonal_ids:
-            continue
-        anime = seasonal_ids[anime_id]
-        title = anime["title"]
-        broadcast = anime.get("broadcast", {})
-        day = broadcast.get("day_of_the_week")
-        weekday_idx = get_weekday_index(day)
-        if weekday_idx == -1:
+        anime = seasonal_ids.get(anime_id)
+        if anime is None:
             continue
+        day = (anime.get("broadcast") or {}).get("day_of_the_week")
+        if get_weekday_index(day) != -1:
+            ids.append(anime_id)
+    return ids
 
-        watched_eps = entry["list_status"]["num_episodes_watched"]
-        mal_eps = anime.get("num_episodes")
-        total_eps = "?"
-        next_ep = None
+def build_entry(entry, anime, anilist_by_mal_id, airing_timeline=None):
+    """One board entry from a watching-list entry, its catalogue node and any AniList info.
 
-        try:
-            anilist_info = query_anilist_by_mal_id(anime_id)
-            anilist_eps = anilist_info.get("episodes")
-            next_ep = anilist_info.get("nextAiringEpisode")
-
-            if (
-                isinstance(mal_eps, int) and mal_eps > 0 and
-                isinstance(anilist_eps, int) and anilist_eps > 0
-            ):
-                offset = mal_eps - anilist_eps
-                total_eps = anilist_eps + offset
-                if next_ep and "episode" in next_ep:
-                    next_ep["episode"] += offset
-            else:
-                total_eps = anilist_eps or mal_eps or "?"
+    With a schedule for the title in airing_timeline, the entry carries it
+    and its next episode comes from there. Returns None for titles without
+    a broadcast weekday.
+    """
+    base = base_entry(entry, anime)
+    return with_airing(base, anime, anilist_by_mal_id, airing_timeline) if base is not None else None
 
-            if next_ep:
-                airing_timestamp = next_ep["airingAt"]
-                airing_dt = datetime.datetime.fromtimestamp(airing_timestamp, JST)
-                time_until_sec = next_ep["timeUntilAiring"]
-                next_in_hours = int(time_until_sec // 3600)
+def base_entry(entry, anime):
+    """A watching-list entry's board entry before any airing info, or None without a weekday."""
+    weekday_idx = get_weekday_index((anime.get("broadcast") or {}).get("day_of_the_week"))
+    if weekday_idx == -1:
+        return None
+    watched_eps = entry["list_status"]["num_episodes_watched"]
+    total_eps = anime.get("num_episodes") or "?"
+
+    cover_url = None
+    if "main_picture" in anime and anime["main_picture"]:
+        cover_url = anime["main_picture"].get("medium") or anime["main_picture"].get("large")
+
+    return {
+        "title": anime["title"],
+        "mal_id": entry["node"]["id"],
+        "watched_eps": watched_eps,
+        "total_eps": total_eps,
+        "next_in_hours": None,
+        "next_episode": None,
+        "airing_at": None,
+        "episode_offset": 0,
+        "status": compute_status(watched_eps, total_eps, None),
+        "cover_url": cover_url,
+        "weekday_idx": weekday_idx,
+        "score": entry["list_status"].get("score", 0)
+    }
+
+def with_airing(base, anime, anilist_by_mal_id, airing_timeline=None):
+    """A copy of base (see base_entry) with the title's AniList info and schedule applied.
+
+    Only the episode count, offset, next episode, countdown and status
+    depend on airing, so a base entry can be kept and reused while its
+    list entry does not change.
+    """
+    anime_info = dict(base)
+    anilist_info = anilist_by_mal_id.get(base["mal_id"])
+    if anilist_info is None:
+        return anime_info
+    mal_eps = anime.get("num_episodes")
+    try:
+        anilist_eps = anilist_info.get("episodes")
+        next_ep = anilist_info.get("nextAiringEpisode")
+        offset = episode_offset(mal_eps, anilist_eps)
+        total_eps = anilist_eps + offset if offset else anilist_eps or mal_eps or "?"
+        next_episode = next_ep["episode"] + offset if next_ep else None
+        airing_at = next_ep["airingAt"] if next_ep else None
+        next_in_hours = int(next_ep["timeUntilAiring"] // 3600) if next_ep else None
+    except Exception:
+        return anime_info
+
+    anime_info.update({
+        "total_eps": total_eps,
+        "next_in_hours": next_in_hours,
+        "next_episode": next_episode,
+        "airing_at": airing_at,
+        "episode_offset": offset,
+        "status": compute_status(anime_info["watched_eps"], total_eps, next_episode)
+    })
+
+    if airing_timeline is not None:
+        schedule = airing_timeline.schedule(base["mal_id"], offset)
+        if schedule:
+            anime_info["schedule"] = schedule
+            update_countdown(anime_info)
+
+    return anime_info
+
+def board_items(anime_by_day):
+    """(position, entry, final) items for a finished board, in the form iter_anime_data yields."""
+    entries = [anime for anime_list in anime_by_day for anime in anime_list]
+    return [(position, anime, True) for position, anime in enumerate(entries)]
+
+def assemble_board(items):
+    """Group (position, entry, final) items into anime_by_day, ordered like the batch path.
+
+    Later items for a title replace earlier ones.
+    """
+    latest = {}
+    for position, anime, final in items:
+        latest[anime["mal_id"]] = (position, anime)
+    anime_by_day = [[] for _ in range(7)]
+    for position, anime in sorted(latest.values(), key=lambda item: item[0]):
+        anime_by_day[anime["weekday_idx"]].append(anime)
+    return anime_by_day
+
+def merge_board_entries(anime_by_day, entries):
+    """A copy of anime_by_day with entries applied.
+
+    Titles already on the board are replaced in place, or moved if their
+    weekday changed; new titles are appended to their day.
+    """
+    updates = {anime["mal_id"]: anime for anime in entries}
+    merged = [[] for _ in range(7)]
+    for day, anime_list in enumerate(anime_by_day):
+        for anime in anime_list:
+            new = updates.get(anime["mal_id"])
+            if new is None:
+                merged[day].append(anime)
+            elif new["weekday_idx"] == day:
+                merged[day].append(updates.pop(anime["mal_id"]))
+    for anime in updates.values():
+        merged[anime["weekday_idx"]].append(anime)
+    return merged
+
+def provisional_entries(watching_list, nodes):
+    """Entries built from MAL data alone, before their airing info has arrived."""
+    for position, entry in enumerate(watching_list):
+        node = nodes.get(entry["node"]["id"])
+        anime = base_entry(entry, node) if node is not None else None
+        if anime is not None:
+            yield position, anime, False
+
+def resolved_entries(watching_list, nodes, airing_futures, airing_timeline=None, base_entries=None):
+    """Final entries, one AniList chunk at a time as the lookups complete.
+
+    airing_futures maps each future to the MAL IDs it resolves. base_entries,
+    {mal_id: base_entry(...)} for watching_list, saves building them again.
+    """
+    positions = {entry["node"]["id"]: position for position, entry in enumerate(watching_list)}
+    for future in as_completed(airing_futures):
+        anilist_by_mal_id = future.result()
+        for mal_id in airing_futures[future]:
+            position = positions.get(mal_id)
+            node = nodes.get(mal_id)
+            if position is None or node is None:
+                continue
+            if base_entries is not None:
+                base = base_entries.get(mal_id)
             else:
-                airing_dt = None
-                next_in_hours = None
+                base = base_entry(watching_list[position], node)
+            if base is not None:
+                yield position, with_airing(base, node, anilist_by_mal_id, airing_timeline), True
 
-        except Exception:
-            total_eps = mal_eps or "?"
-            airing_dt = None
-            next_in_hours = None
-            next_ep = None
+def submit_airing_chunks(pool, mal_ids, nodes, airing_timeline):
+    """Submit batched AniList lookups for mal_ids to pool, one future per page.
 
-        if next_ep is None:
-            status = "GREEN" if (isinstance(total_eps, int) and watched_eps >= total_eps > 0) else "RED"
-        else:
-            aired_eps = next_ep["episode"] - 1
-            status = "GREEN" if watched_eps >= aired_eps else "RED"
-
-        cover_url = None
-        if "main_picture" in anime and anime["main_picture"]:
-            cover_url = anime["main_picture"].get("medium") or anime["main_picture"].get("large")
-
-        anime_info = {
-            "title": title,
-            "mal_id": anime_id,
-            "watched_eps": watched_eps,
-            "total_eps": total_eps,
-            "next_in_hours": next_in_hours,
-            "status": status,
-            "cover_url": cover_url,
-            "weekday_idx": weekday_idx,
-            "score": entry["list_status"].get("score", 0)
+    Each also brings the chunk's schedules in airing_timeline up to date.
+    Returns {future: the MAL IDs it resolves}.
+    """
+    chunks = [mal_ids[i:i + ANILIST_PAGE_SIZE] for i in range(0, len(mal_ids), ANILIST_PAGE_SIZE)]
+    return {pool.submit(resolve_airing, chunk, nodes, airing_timeline): chunk for chunk in chunks}
+
+def is_in_season(anime, season, year):
+    start_season = anime.get("start_season") or {}
+    return start_season.get("season") == season and start_season.get("year") == year
+
+def is_board_title(anime, season, year):
+    """Titles from this season, plus carry-overs from earlier seasons that are still airing."""
+    return is_in_season(anime, season, year) or anime.get("status") == "currently_airing"
+
+def board_nodes(index, watching_list, season, year):
+    """{mal_id: node} for the watched titles the index knows that belong on the board."""
+    nodes = {}
+    for entry in watching_list:
+        node = index.get(entry["node"]["id"])
+        if node is not None and is_board_title(node, season, year):
+            nodes[node["id"]] = node
+    return nodes
+
+def sync_catalogue_index(index, pool, past_futures, watched_ids, max_age):
+    """Finish updating index once the watching list is known.
+
+    past_futures maps earlier seasons to their catalogue downloads; each
+    season that arrives is closed and not fetched again. Watched titles that
+    are still missing, or still airing and older than max_age seconds, are
+    then looked up one by one.
+    """
+    for (season, year), future in past_futures.items():
+        try:
+            index.add(entry["node"] for entry in future.result())
+            index.mark_season(season, year, closed=True)
+        except Exception as e:
+            print(f"Failed to fetch the {season} {year} catalogue: {e}")
+
+    stale = [mal_id for mal_id in watched_ids if index.is_stale(mal_id, max_age)]
+    futures = {mal_id: pool.submit(get_anime_details, mal_id) for mal_id in stale}
+    for mal_id, future in futures.items():
+        try:
+            index.add([future.result()])
+        except Exception as e:
+            print(f"Failed to fetch details for {mal_id}: {e}")
+
+def iter_catalogue_join(username, max_workers, force_refresh=False):
+    """Join the watching list against the local catalogue index.
+
+    The current season is paged into the index on the calling thread while
+    the watching list and any earlier seasons not yet indexed (see
+    CATALOGUE_SEASONS) load in a worker pool. AniList lookups are submitted
+    to the same pool as soon as watched board titles become known.
+    """
+    started = time.time()
+    season, year = get_current_season()
+    index = CatalogueIndex.load()
+    seasons = recent_seasons(season, year, getattr(config, "CATALOGUE_SEASONS", 4))
+    airing_timeline = AiringTimeline.load()
+    requested_ids = set()
+    airing_futures = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        def submit_airing_lookups(watching_list):
+            nodes = board_nodes(index, watching_list, season, year)
+            pending = [
+                anime_id for anime_id in airing_lookup_ids(watching_list, nodes)
+                if anime_id not in requested_ids
+            ]
+            requested_ids.update(pending)
+            airing_futures.update(submit_airing_chunks(pool, pending, nodes, airing_timeline))
+
+        watching_future = pool.submit(sync_watching_list, username, force_refresh)
+        past_futures = {
+            (past_season, past_year): pool.submit(get_seasonal_anime, past_season, past_year, use_cache=False)
+            for past_season, past_year in seasons[1:]
+            if not index.season_closed(past_season, past_year)
         }
+        with tracing.span("fetch.season_catalogue"):
+            for page in iter_seasonal_pages(season, year, force_refresh):
+                index.add(entry["node"] for entry in page)
+                if watching_future.done():
+                    submit_airing_lookups(watching_future.result().list())
 
-        anime_by_day[weekday_idx].append(anime_info)
+        watching_list = watching_future.result().list()
+        watched_ids = [entry["node"]["id"] for entry in watching_list]
+        with tracing.span("fetch.catalogue_index"):
+            # A full refresh re-fetches every airing title not updated during this fetch
+            max_age = time.time() - started if force_refresh else getattr(config, "SEASONAL_CACHE_TTL", 24 * 3600)
+            sync_catalogue_index(index, pool, past_futures, watched_ids, max_age)
+            index.prune(seasons, set(watched_ids))
+            index.save()
 
+        nodes = board_nodes(index, watching_list, season, year)
+        yield from provisional_entries(watching_list, nodes)
+        with tracing.span("fetch.airing"):
+            submit_airing_lookups(watching_list)
+            yield from resolved_entries(watching_list, nodes, airing_futures, airing_timeline)
+        airing_timeline.prune(requested_ids)
+        airing_timeline.save()
 
-    return anime_by_day
+def board_base_entry(entry, season, year):
+    """The board entry for a list entry before any airing info, or None if it is not a board title."""
+    node = entry["node"]
+    return base_entry(entry, node) if is_board_title(node, season, year) else None
+
+def iter_watching_driven(username, max_workers, force_refresh=False):
+    """Build the board from the synced watching list alone.
+
+    The node fields the board needs come with the list, and titles that are
+    neither from the current season nor still airing are filtered out
+    locally, so no season catalogue is ever downloaded. Entries are only
+    rebuilt for list entries that changed since the last sync.
+    """
+    season, year = get_current_season()
+    watching = sync_watching_list(username, full=force_refresh)
+    base_entries = watching.derive(season_key(season, year), lambda entry: board_base_entry(entry, season, year))
+    watching.save()
+    watching_list = watching.list()
+    seasonal_ids = {
+        mal_id: watching.entries[mal_id]["node"] for mal_id, anime in base_entries.items() if anime is not None
+    }
+
+    for position, anime in enumerate(base_entries.values()):
+        if anime is not None:
+            yield position, dict(anime), False
+    airing_timeline = AiringTimeline.load()
+    with tracing.span("fetch.airing"), ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        airing_futures = submit_airing_chunks(pool, list(seasonal_ids), seasonal_ids, airing_timeline)
+        yield from resolved_entries(watching_list, seasonal_ids, airing_futures, airing_timeline, base_entries)
+    airing_timeline.prune(seasonal_ids)
+    airing_timeline.save()
+
+def iter_anime_data(max_workers=None, force_refresh=False, mode=None):
+    """Yield (position, entry, final) items as board entries become ready.
+
+    Every board title is first yielded from its MAL data alone (final is
+    False), as soon as that is known, then again with its airing info once
+    its AniList lookup completes. position orders titles as the watching
+    list does; assemble_board turns the items into anime_by_day.
+
+    mode is "watching" (the default, see FETCH_MODE) to build the board from
+    the watching list alone, or "catalogue" to join against the full season
+    catalogue. The watching mode falls back to the catalogue join if it
+    fails before yielding anything. force_refresh bypasses the season
+    catalogue cache and fully resyncs the watching list.
+    """
+    username = config.USERNAME
+    if max_workers is None:
+        max_workers = getattr(config, "FETCH_WORKERS", 4)
+    if mode is None:
+        mode = getattr(config, "FETCH_MODE", "watching")
+
+    with tracing.span("fetch", mode=mode) as span:
+        if mode == "watching":
+            yielded = False
+            try:
+                for item in iter_watching_driven(username, max_workers, force_refresh):
+                    yielded = True
+                    yield item
+                return
+            except Exception as e:
+                if yielded:
+                    raise
+                print(f"Watching-list fetch failed, falling back to the season catalogue: {e}")
+                span.set(fallback=True)
+
+        yield from iter_catalogue_join(username, max_workers, force_refresh)
+
+def fetch_anime_data(max_workers=None, force_refresh=False, mode=None):
+    """Fetch the watched seasonal titles grouped by broadcast weekday. See iter_anime_data."""
+    return assemble_board(iter_anime_data(max_workers, force_refresh, mode))
 
 
 if __name__ == "__main__":
-    data = fetch_anime_data()
+    import sys
+    import requests
+    import daemon
+
+    if "--daemon" in sys.argv:
+        daemon.serve()
+        sys.exit()
+
+    try:
+        # Print a running daemon's board rather than fetching everything again
+        data = daemon.DaemonClient().get_board()
+    except (requests.RequestException, daemon.DaemonError):
+        data = fetch_anime_data()
     days = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
     for i, day in enumerate(days):
         print(f"Day {i} ({day}):")
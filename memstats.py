@@ -0,0 +1,106 @@
+"""Memory and Qt object counters, for the Stats dialog and benchmarks/soak.py.
+
+    memstats.counters()          # RSS, live QObjects, widgets, QPixmaps, cover cache
+    memstats.top_allocations()   # biggest allocation sites once tracemalloc is on
+
+counters() walks every top-level widget and the Python heap, so it is meant
+to be called on demand, not on every frame.
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+from PyQt6.QtCore import QObject
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtWidgets import QApplication, QLabel
+
+import covers
+import tasks
+
+MIB = 1024 * 1024
+
+def rss_bytes():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    if sys.platform == "win32":
+        return windows_rss_bytes()
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def windows_rss_bytes():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+    return counters.WorkingSetSize
+
+def counters():
+    """A snapshot of the process's memory and live object counts."""
+    app = QApplication.instance()
+    top_levels = app.topLevelWidgets() if app else []
+    children = [child for widget in top_levels for child in widget.findChildren(QObject)]
+    objects = gc.get_objects()
+    return {
+        "rss_mib": rss_bytes() / MIB,
+        "qobjects": len(top_levels) + len(children),
+        "widgets": len(app.allWidgets()) if app else 0,
+        # QPixmaps referenced from Python, plus the copies labels hold on the C++ side
+        "pixmaps": sum(1 for obj in objects if isinstance(obj, QPixmap)),
+        "label_pixmaps": sum(1 for child in children if isinstance(child, QLabel) and not child.pixmap().isNull()),
+        "cover_cache": len(covers._pixmaps),
+        "tasks": len(tasks._active_tasks),
+        "python_objects": len(objects),
+        "traced_mib": tracemalloc.get_traced_memory()[0] / MIB if tracemalloc.is_tracing() else None
+    }
+
+def top_allocations(limit=10, baseline=None):
+    """tracemalloc's largest allocation sites as text lines, or growth since baseline if given."""
+    if not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    if baseline is not None:
+        stats = snapshot.compare_to(baseline, "lineno")
+    else:
+        stats = snapshot.statistics("lineno")
+    return [str(stat) for stat in stats[:limit]]
+
+def summary_text():
+    """Plain-text report of counters() and, when tracking, the top allocation sites."""
+    c = counters()
+    lines = [
+        "Memory",
+        f"  RSS {c['rss_mib']:.1f} MiB, {c['python_objects']} Python objects",
+        f"  {c['qobjects']} QObjects under top-level widgets, {c['widgets']} widgets, {c['tasks']} tasks running",
+        f"  {c['pixmaps']} QPixmaps held from Python, {c['label_pixmaps']} labels showing one, "
+        f"{c['cover_cache']} covers cached",
+    ]
+    if c["traced_mib"] is None:
+        lines.append("  Allocation tracking is off")
+    else:
+        lines.append(f"  {c['traced_mib']:.1f} MiB traced; largest allocation sites:")
+        lines.extend("    " + line for line in top_allocations())
+    return "\n".join(lines)
@@ -0,0 +1,179 @@
+import email.utils
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+import tracing
+import transport
+from auth import config
+
+# Priorities: user-triggered writes go ahead of background refreshes
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# host -> (requests per second, burst). MAL publishes no limit; these stay
+# well clear of where it starts answering 403/429. AniList allows 90 a minute.
+# Hosts not listed here are only throttled when they answer 429.
+HOST_LIMITS = {
+    "api.myanimelist.net": (2.0, 5),
+    "myanimelist.net": (1.0, 3),
+    "graphql.anilist.co": (1.5, 10),
+    "cdn.myanimelist.net": (10.0, 20),
+}
+
+RETRY_STATUSES = {500, 502, 503, 504}
+
+class HostLimiter:
+    """Token bucket for one host, with priorities and server-imposed pauses.
+
+    A request takes one token; tokens refill at rate per second up to burst.
+    Retry-After and AniList's X-RateLimit-* headers pause the whole host or
+    shrink the bucket to what the server says is left. Background requests
+    wait while an interactive one is queued for the same host.
+    """
+    def __init__(self, host, rate=None, burst=1):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waiting = [0, 0]
+        self.cond = threading.Condition()
+
+    def refill(self, now):
+        if self.rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=BACKGROUND):
+        """Block until this request may go out. Returns the seconds spent waiting."""
+        start = time.monotonic()
+        with self.cond:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.refill(now)
+                    wait = self.blocked_until - now
+                    if wait <= 0:
+                        if any(self.waiting[:priority]):
+                            wait = None
+                        elif self.rate is None:
+                            return now - start
+                        elif self.tokens >= 1:
+                            self.tokens -= 1
+                            return now - start
+                        else:
+                            wait = (1 - self.tokens) / self.rate
+                    self.cond.wait(wait)
+            finally:
+                self.waiting[priority] -= 1
+                self.cond.notify_all()
+
+    def pause(self, seconds):
+        with self.cond:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.cond.notify_all()
+
+    def observe(self, response):
+        """Apply the rate limit headers of a response. Returns the pause it asked for, if any."""
+        headers = response.headers
+        wait = parse_retry_after(headers.get("Retry-After"))
+        remaining = header_int(headers, "X-RateLimit-Remaining")
+        reset = header_int(headers, "X-RateLimit-Reset")
+        if wait is None and reset is not None and (response.status_code == 429 or remaining == 0):
+            wait = max(0.0, reset - time.time())
+        if remaining is not None:
+            with self.cond:
+                self.tokens = min(self.tokens, remaining)
+        if wait is not None:
+            self.pause(wait)
+        return wait
+
+def header_int(headers, name):
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def limiter_for(url):
+    host = urlsplit(url).hostname or ""
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limits = {**HOST_LIMITS, **getattr(config, "RATE_LIMITS", {})}
+            rate, burst = limits.get(host, (None, 1))
+            limiter = _limiters[host] = HostLimiter(host, rate, burst)
+        return limiter
+
+def request(method, url, priority=BACKGROUND, attempts=None, **kwargs):
+    """transport.send, paced per host and retried on 429, transient 5xx and connection errors.
+
+    Returns the last response; callers still check its status. Raises the
+    last exception if every attempt failed to connect.
+    """
+    attempts = attempts or getattr(config, "REQUEST_RETRIES", 4)
+    limiter = limiter_for(url)
+    for attempt in range(attempts):
+        waited = limiter.acquire(priority)
+        last_attempt = attempt == attempts - 1
+        try:
+            with tracing.span("http", host=limiter.host, method=method) as span:
+                response = transport.send(method, url, **kwargs)
+                if tracing.enabled:
+                    span.set(
+                        endpoint=endpoint_of(url), status=response.status_code, bytes=len(response.content),
+                        attempt=attempt, wait_ms=waited * 1000,
+                        cache="revalidated" if response.status_code == 304 else "miss"
+                    )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if last_attempt:
+                raise
+            delay = backoff(attempt)
+            print(f"Request to {limiter.host} failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        wait = limiter.observe(response)
+        if last_attempt:
+            return response
+        if response.status_code == 429:
+            if wait is None:
+                wait = backoff(attempt)
+                limiter.pause(wait)
+            print(f"Rate limited by {limiter.host}, waiting {wait:.1f}s")
+        elif response.status_code in RETRY_STATUSES:
+            delay = backoff(attempt)
+            print(f"{limiter.host} answered {response.status_code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+        else:
+            return response
+
+def endpoint_of(url):
+    """URL path with numeric path segments folded, e.g. /v2/anime/{id}/my_list_status."""
+    return re.sub(r"/\d+(?=/|$)", "/{id}", urlsplit(url).path)
+
+def backoff(attempt):
+    """Exponential backoff with full jitter: up to 1, 2, 4... seconds."""
+    return random.uniform(0, 2 ** attempt)
@@ -0,0 +1,283 @@
+"""Static board image: the seven-day board composited into a PNG, no window.
+
+    python render.py                      # fetch and render cache/board.png at RENDER_SIZE
+    python render.py --set-wallpaper      # then make it the desktop background
+    python render.py --out board.png --size 3840x2160
+
+Instead of keeping wallpaper.py's widget tree alive all week, run this from
+cron or Task Scheduler: it reads a running daemon's board (or fetches one),
+renders it offscreen and exits. With RENDER_MODE = "image" in
+auth/config.py, wallpaper.py does the same.
+
+Renders are incremental across runs. The card layout and what every card
+showed are kept in cache/render.json; when the layout did not change, the
+previous PNG is loaded and only cards whose data changed are repainted,
+so only their covers are decoded.
+"""
+import argparse
+import ctypes
+import math
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from PyQt6.QtCore import QRect, QSize, Qt
+from PyQt6.QtGui import QColor, QFont, QGuiApplication, QImage, QPainter
+
+import cache
+import covers
+from auth import config
+from board_view import CARD_WIDTH, card_rects, countdown_text, paint_card
+from daemon import DaemonClient, DaemonError
+from mal import fetch_anime_data, update_countdown
+from snapshot import load_snapshot, save_snapshot
+
+RENDER_VERSION = 1
+
+DAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+BACKGROUND = QColor("#121212")
+MARGIN = 12
+SPACING = 12
+HEADER_HEIGHT = 48
+# Down to the bottom of the countdown line, which runs past CARD_HEIGHT
+CARD_FOOTPRINT = card_rects(QRect(0, 0, CARD_WIDTH, 0))[3][-1].bottom() + 1
+
+def render_path():
+    return getattr(config, "RENDER_PATH", None) or os.path.join(cache.CACHE_DIR, "board.png")
+
+def manifest_path():
+    return os.path.join(cache.CACHE_DIR, "render.json")
+
+def card_key(anime):
+    """Everything a card shows; it is repainted when this changes."""
+    return [anime["title"], anime["status"], anime["watched_eps"], anime["total_eps"],
+            countdown_text(anime.get("next_in_hours")), anime.get("cover_url")]
+
+def day_span(day, unit_width):
+    """Left and right edge of a day column. Sunday is two cards wide, as on the live board."""
+    start = 0 if day == 0 else day + 1
+    width = 2 if day == 0 else 1
+    return MARGIN + start * unit_width, MARGIN + (start + width) * unit_width
+
+def board_layout(anime_by_day, width, height, max_scale=1.0):
+    """(scale, {mal_id: [x, y, w, h]}), cards shrunk until the fullest column fits."""
+    unit_width = (width - 2 * MARGIN) / 8
+    rows = max([math.ceil(len(anime_list) / (2 if day == 0 else 1)) for day, anime_list in enumerate(anime_by_day)]
+               + [1])
+    scale = min(max_scale, unit_width / (CARD_WIDTH + SPACING),
+                (height - 2 * MARGIN - HEADER_HEIGHT) / (rows * (CARD_FOOTPRINT + SPACING)))
+    card_width, card_height = math.ceil(CARD_WIDTH * scale), math.ceil(CARD_FOOTPRINT * scale)
+    gap = SPACING * scale
+    rects = {}
+    for day, anime_list in enumerate(anime_by_day):
+        columns = 2 if day == 0 else 1
+        left, right = day_span(day, unit_width)
+        x = left + (right - left - columns * card_width - (columns - 1) * gap) / 2
+        for i, anime in enumerate(anime_list):
+            row, column = divmod(i, columns)
+            rects[anime["mal_id"]] = [round(x + column * (card_width + gap)),
+                                      round(MARGIN + HEADER_HEIGHT + row * (card_height + gap)),
+                                      card_width, card_height]
+    return scale, rects
+
+def load_cover_images(entries):
+    """url -> QImage for the covers of entries, None where loading failed."""
+    def load(url):
+        try:
+            return url, covers.load_cover_image(url)
+        except Exception as e:
+            print(f"Failed to load image {url}: {e}")
+            return url, None
+
+    urls = {anime["cover_url"] for anime in entries if anime.get("cover_url")}
+    if not urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, getattr(config, "FETCH_WORKERS", 4))) as pool:
+        return dict(pool.map(load, urls))
+
+class BoardImage:
+    """A rendered board and what each of its cards shows.
+
+    cards maps str(mal_id) to the card's rect and card_key(), or a key of
+    None when its cover failed to load, so the next render retries it.
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.image = None
+        self.scale = None
+        self.cards = {}
+
+    @classmethod
+    def load(cls, width, height, path=None):
+        """The render saved at path if it is that size and unchanged since, otherwise a blank board."""
+        board = cls(width, height)
+        path = os.path.abspath(path or render_path())
+
+        def read(data):
+            if data["path"] == path and data["size"] == [width, height] and data["mtime"] == os.path.getmtime(path):
+                image = QImage(path)
+                if image.size() == QSize(width, height):
+                    board.image = image.convertToFormat(QImage.Format.Format_RGB32)
+                    board.scale = data["scale"]
+                    board.cards = data["cards"]
+
+        cache.load_versioned_json(manifest_path(), RENDER_VERSION, "render manifest", read)
+        return board
+
+    def save(self, path=None):
+        path = os.path.abspath(path or render_path())
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp.png"
+        if not self.image.save(tmp_path, "PNG"):
+            raise OSError(f"could not write {tmp_path}")
+        os.replace(tmp_path, path)
+        cache.write_json_atomic(manifest_path(), {
+            "version": RENDER_VERSION,
+            "path": path,
+            "size": [self.width, self.height],
+            "mtime": os.path.getmtime(path),
+            "scale": self.scale,
+            "cards": self.cards
+        })
+
+    def render(self, anime_by_day, max_scale=1.0):
+        """Paint anime_by_day and return how many cards were painted.
+
+        The whole board is painted when the layout changed; otherwise only
+        cards whose key changed.
+        """
+        scale, rects = board_layout(anime_by_day, self.width, self.height, max_scale)
+        entries = [anime for anime_list in anime_by_day for anime in anime_list]
+        old_rects = {mal_id: card["rect"] for mal_id, card in self.cards.items()}
+        full = (self.image is None or scale != self.scale
+                or old_rects != {str(mal_id): rect for mal_id, rect in rects.items()})
+        dirty = [anime for anime in entries
+                 if full or self.cards[str(anime["mal_id"])]["key"] != card_key(anime)]
+        images = load_cover_images(dirty)
+
+        if full:
+            self.image = QImage(self.width, self.height, QImage.Format.Format_RGB32)
+            self.image.fill(BACKGROUND)
+            self.cards = {}
+        painter = QPainter(self.image)
+        painter.setRenderHints(QPainter.RenderHint.Antialiasing | QPainter.RenderHint.SmoothPixmapTransform)
+        font = QFont("Segoe UI")
+        if full:
+            header_font = QFont(font)
+            header_font.setBold(True)
+            header_font.setPointSize(18)
+            painter.setFont(header_font)
+            painter.setPen(QColor("#ffffff"))
+            unit_width = (self.width - 2 * MARGIN) / 8
+            for day, name in enumerate(DAYS):
+                left, right = day_span(day, unit_width)
+                painter.drawText(QRect(round(left), MARGIN, round(right - left), HEADER_HEIGHT),
+                                 Qt.AlignmentFlag.AlignCenter, name)
+        for anime in dirty:
+            x, y, width, height = rects[anime["mal_id"]]
+            painter.fillRect(QRect(x, y, width, height), BACKGROUND)
+            painter.save()
+            painter.translate(x, y)
+            painter.scale(scale, scale)
+            url = anime.get("cover_url")
+            paint_card(painter, QRect(0, 0, CARD_WIDTH, CARD_FOOTPRINT), anime, images.get(url),
+                       anime["watched_eps"], font, buttons=False)
+            painter.restore()
+            loaded = not url or images.get(url) is not None
+            self.cards[str(anime["mal_id"])] = {"rect": [x, y, width, height],
+                                                "key": card_key(anime) if loaded else None}
+        painter.end()
+        self.scale = scale
+        return len(dirty)
+
+def fetch_board():
+    """A running daemon's board, else a fresh fetch, else the last snapshot."""
+    if getattr(config, "USE_DAEMON", True):
+        try:
+            return DaemonClient().refresh()
+        except (requests.RequestException, DaemonError):
+            pass
+    try:
+        anime_by_day = fetch_anime_data()
+    except Exception as e:
+        print(f"Fetch failed, rendering the last snapshot: {e}")
+        return load_snapshot()
+    save_snapshot(anime_by_day)
+    return anime_by_day
+
+def set_wallpaper_image(path):
+    """Make the image at path the desktop background.
+
+    WALLPAPER_COMMAND, an argument list containing "{path}", replaces the
+    built-in setters (Windows, macOS, GNOME), e.g. ["feh", "--bg-fill", "{path}"].
+    """
+    path = os.path.abspath(path)
+    command = getattr(config, "WALLPAPER_COMMAND", None)
+    if command:
+        subprocess.run([part.replace("{path}", path) for part in command], check=True)
+    elif sys.platform == "win32":
+        SPI_SETDESKWALLPAPER = 20
+        SPIF_UPDATEINIFILE_SENDCHANGE = 0x01 | 0x02
+        if not ctypes.windll.user32.SystemParametersInfoW(SPI_SETDESKWALLPAPER, 0, path,
+                                                          SPIF_UPDATEINIFILE_SENDCHANGE):
+            raise ctypes.WinError()
+    elif sys.platform == "darwin":
+        script = f'tell application "System Events" to tell every desktop to set picture to "{path}"'
+        subprocess.run(["osascript", "-e", script], check=True)
+    else:
+        uri = Path(path).as_uri()
+        subprocess.run(["gsettings", "set", "org.gnome.desktop.background", "picture-uri", uri], check=True)
+        # Only newer GNOME has a separate dark-style wallpaper
+        subprocess.run(["gsettings", "set", "org.gnome.desktop.background", "picture-uri-dark", uri],
+                       stderr=subprocess.DEVNULL)
+
+def parse_size(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+def main(argv=None):
+    width, height = getattr(config, "RENDER_SIZE", (1920, 1080))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=render_path(), help="PNG to write")
+    parser.add_argument("--size", type=parse_size, default=(width, height), metavar="WxH")
+    parser.add_argument("--full", action="store_true", help="repaint every card, not just the changed ones")
+    parser.add_argument("--set-wallpaper", action="store_true", help="make the image the desktop background")
+    args = parser.parse_args(argv)
+
+    # No window is ever shown, so no display is needed either
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+
+    anime_by_day = fetch_board()
+    if anime_by_day is None:
+        print("No board to render.")
+        return 1
+    now = time.time()
+    for anime_list in anime_by_day:
+        for anime in anime_list:
+            update_countdown(anime, now)
+
+    start = time.perf_counter()
+    board = BoardImage(*args.size) if args.full else BoardImage.load(*args.size, path=args.out)
+    blank = board.image is None
+    painted = board.render(anime_by_day, getattr(config, "RENDER_MAX_SCALE", 1.0))
+    if painted or blank:
+        board.save(args.out)
+    total = sum(len(anime_list) for anime_list in anime_by_day)
+    print(f"Painted {painted} of {total} cards into {args.out} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    if args.set_wallpaper:
+        try:
+            set_wallpaper_image(args.out)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Failed to set the wallpaper: {e}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
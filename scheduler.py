@@ -0,0 +1,86 @@
+import time
+
+from PyQt6.QtCore import QObject, QTimer
+
+import timeline
+from auth import config
+
+class AiringScheduler(QObject):
+    """Keeps the board current without manual refreshes.
+
+    Countdown labels tick locally once a minute. Shortly after a tracked
+    episode airs, only that title's airing info is re-queried; if AniList has
+    not moved on to the next episode yet, the title is retried at a slower
+    interval. Titles with an airing schedule move on to their next episode
+    locally and are re-queried once after each episode that airs while the
+    app runs, to catch delays. An optional low-frequency full sync runs in
+    the background.
+    """
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.started = time.time()
+        # mal_id -> (airing_at, attempted_at) of the last targeted re-query
+        self.attempts = {}
+
+        self.tick_timer = QTimer(self)
+        self.tick_timer.timeout.connect(self.window.tick_countdowns)
+        self.tick_timer.start(60 * 1000)
+
+        self.airing_timer = QTimer(self)
+        self.airing_timer.setSingleShot(True)
+        self.airing_timer.timeout.connect(self.on_airing_due)
+
+        self.sync_timer = QTimer(self)
+        self.sync_timer.timeout.connect(lambda: self.window.refresh_data(kind="sync"))
+        sync_minutes = getattr(config, "BACKGROUND_SYNC_MINUTES", 0)
+        if sync_minutes:
+            self.sync_timer.start(int(sync_minutes * 60 * 1000))
+
+    def airing_to_check(self, anime, now):
+        """The airing time whose re-query is pending for anime, or None."""
+        schedule = anime.get("schedule")
+        if not schedule:
+            return anime.get("airing_at")
+        last = timeline.last_aired_at(schedule, now)
+        attempt = self.attempts.get(anime["mal_id"])
+        if last is not None and last > self.started and not (attempt and attempt[0] == last):
+            return last
+        upcoming = timeline.next_airing(schedule, now)
+        return upcoming[1] if upcoming else None
+
+    def due_times(self, now=None):
+        """When each title with a known airing time should be re-queried."""
+        now = time.time() if now is None else now
+        delay = getattr(config, "AIRING_REFRESH_DELAY", 5 * 60)
+        retry = getattr(config, "AIRING_RETRY_INTERVAL", 15 * 60)
+        due = {}
+        for anime in self.window.all_entries():
+            airing_at = self.airing_to_check(anime, now)
+            if airing_at is None:
+                continue
+            attempt = self.attempts.get(anime["mal_id"])
+            if attempt and attempt[0] == airing_at:
+                due[anime["mal_id"]] = attempt[1] + retry
+            else:
+                due[anime["mal_id"]] = airing_at + delay
+        return due
+
+    def reschedule(self):
+        due = self.due_times()
+        if not due:
+            self.airing_timer.stop()
+            return
+        wait = max(0.0, min(due.values()) - time.time())
+        # QTimer intervals are 32-bit milliseconds, so wake up at least daily
+        self.airing_timer.start(int(min(wait, 24 * 3600) * 1000))
+
+    def on_airing_due(self):
+        now = time.time()
+        self.window.tick_countdowns()
+        due_ids = [mal_id for mal_id, when in self.due_times(now).items() if when <= now]
+        for mal_id in due_ids:
+            self.attempts[mal_id] = (self.airing_to_check(self.window.find_entry(mal_id), now), now)
+        if due_ids:
+            self.window.refresh_airing(due_ids)
+        self.reschedule()
@@ -0,0 +1,46 @@
+import os
+import time
+
+import cache
+from mal import update_countdown
+
+SNAPSHOT_PATH = os.path.join(cache.CACHE_DIR, "board.json")
+SNAPSHOT_VERSION = 1
+
+REQUIRED_KEYS = ("title", "mal_id", "watched_eps", "total_eps", "status", "cover_url", "weekday_idx", "score")
+
+def save_snapshot(anime_by_day, path=None):
+    """Atomically store the last successful fetch so the next start can render at once."""
+    cache.save_versioned_json(path or SNAPSHOT_PATH, SNAPSHOT_VERSION, "board snapshot", {
+        "saved_at": time.time(),
+        "anime_by_day": anime_by_day
+    })
+
+def checked_board(snapshot):
+    """The snapshot's board; raises ValueError unless it has seven columns of complete entries."""
+    anime_by_day = snapshot["anime_by_day"]
+    if not isinstance(anime_by_day, list) or len(anime_by_day) != 7:
+        raise ValueError("expected seven day columns")
+    for anime_list in anime_by_day:
+        for anime in anime_list:
+            missing = [key for key in REQUIRED_KEYS if key not in anime]
+            if missing:
+                raise ValueError(f"entry missing {', '.join(missing)}")
+    return anime_by_day
+
+def load_snapshot(path=None, now=None):
+    """Return the saved board with countdowns brought up to date, or None.
+
+    A missing, corrupt or incompatible snapshot returns None so the caller
+    falls back to a normal fetch.
+    """
+    anime_by_day = cache.load_versioned_json(path or SNAPSHOT_PATH, SNAPSHOT_VERSION, "board snapshot",
+                                             checked_board)
+    if anime_by_day is None:
+        return None
+
+    now = time.time() if now is None else now
+    for anime_list in anime_by_day:
+        for anime in anime_list:
+            update_countdown(anime, now)
+    return anime_by_day
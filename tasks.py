@@ -0,0 +1,80 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+class TaskSignals(QObject):
+    result = pyqtSignal(object)
+    error = pyqtSignal(object)
+    item = pyqtSignal(object)
+    finished = pyqtSignal()
+
+class Task(QRunnable):
+    """Run fn(*args, **kwargs) on a pool thread and emit its result.
+
+    Cancelled tasks never emit, so receivers that went away in the
+    meantime are not called.
+    """
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            if self.cancelled:
+                return
+            try:
+                result = self.call()
+            except Exception as e:
+                if not self.cancelled:
+                    self.signals.error.emit(e)
+                return
+            if not self.cancelled:
+                self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+    def call(self):
+        return self.fn(*self.args, **self.kwargs)
+
+class StreamTask(Task):
+    """Run the generator fn(*args, **kwargs) on a pool thread, emitting each item
+    as it is produced and the list of all items as the result.
+    """
+    def call(self):
+        items = []
+        for item in self.fn(*self.args, **self.kwargs):
+            if self.cancelled:
+                break
+            self.signals.item.emit(item)
+            items.append(item)
+        return items
+
+# Keeps tasks (and their signal objects) alive until their results are delivered
+_active_tasks = set()
+
+def start_task(fn, *args, on_result=None, on_error=None, on_finished=None, **kwargs):
+    return _start(Task(fn, *args, **kwargs), on_result, on_error, on_finished)
+
+def start_stream(fn, *args, on_item=None, on_result=None, on_error=None, on_finished=None, **kwargs):
+    task = StreamTask(fn, *args, **kwargs)
+    if on_item:
+        task.signals.item.connect(on_item)
+    return _start(task, on_result, on_error, on_finished)
+
+def _start(task, on_result, on_error, on_finished=None):
+    if on_result:
+        task.signals.result.connect(on_result)
+    if on_error:
+        task.signals.error.connect(on_error)
+    # finished is emitted even when the task was cancelled
+    if on_finished:
+        task.signals.finished.connect(on_finished)
+    _active_tasks.add(task)
+    task.signals.finished.connect(lambda: _active_tasks.discard(task))
+    QThreadPool.globalInstance().start(task)
+    return task
@@ -0,0 +1,111 @@
+"""Local airing timeline: when every episode of each tracked title airs.
+
+A schedule is a list of [episode, airing_at] pairs sorted by airing time,
+episode numbers already in MAL's numbering. The helpers below answer "what
+has aired by now" and "what airs next" with a binary search, so countdowns
+and caught-up status stay right for any moment without asking AniList.
+
+AiringTimeline keeps the schedules between runs (cache/timeline.json). A
+title's schedule is refetched only when AniList's next episode no longer
+matches it: a delay, a break, or the schedule running past its window.
+"""
+import os
+import threading
+import time
+from bisect import bisect_right
+
+import cache
+
+TIMELINE_VERSION = 1
+
+def timeline_path():
+    return os.path.join(cache.CACHE_DIR, "timeline.json")
+
+def _airing_at(row):
+    return row[1]
+
+def aired_episode(schedule, now):
+    """Number of the latest episode aired by now; the one before the first listed if none has."""
+    i = bisect_right(schedule, now, key=_airing_at)
+    return schedule[i - 1][0] if i else schedule[0][0] - 1
+
+def last_aired_at(schedule, now):
+    i = bisect_right(schedule, now, key=_airing_at)
+    return schedule[i - 1][1] if i else None
+
+def next_airing(schedule, now):
+    """(episode, airing_at) of the first episode airing after now, or None."""
+    i = bisect_right(schedule, now, key=_airing_at)
+    return tuple(schedule[i]) if i < len(schedule) else None
+
+def shifted(schedule, next_episode, now):
+    """True if AniList's next episode, an (episode, airing_at) pair or None, contradicts schedule."""
+    if next_episode is not None and next_episode[1] <= now:
+        return False  # AniList has not moved past an episode that just aired
+    return next_airing(schedule, now) != next_episode
+
+class AiringTimeline:
+    """Persistent mal_id -> schedule store, filled from AniList's airingSchedules."""
+    def __init__(self, path=None):
+        self.path = path or timeline_path()
+        self.titles = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=None):
+        timeline = cls(path)
+        titles = cache.load_versioned_json(timeline.path, TIMELINE_VERSION, "airing timeline", lambda data: {
+            int(mal_id): record for mal_id, record in data["titles"].items()})
+        if titles is not None:
+            timeline.titles = titles
+        return timeline
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            if cache.save_versioned_json(self.path, TIMELINE_VERSION, "airing timeline", {"titles": self.titles}):
+                self.dirty = False
+
+    def schedule(self, mal_id, offset=0):
+        """mal_id's schedule numbered with offset, or None if it has none."""
+        with self.lock:
+            record = self.titles.get(mal_id)
+            if record is None:
+                return None
+            if record["offset"] != offset:
+                # MAL's episode count changed; renumber rather than refetch
+                shift = offset - record["offset"]
+                record["schedule"] = [[episode + shift, airing_at] for episode, airing_at in record["schedule"]]
+                record["offset"] = offset
+                self.dirty = True
+            return record["schedule"] or None
+
+    def needs_sync(self, mal_id, media, offset=0, now=None):
+        """True if mal_id has no schedule for this AniList media, or media's next episode contradicts it."""
+        with self.lock:
+            record = self.titles.get(mal_id)
+            if record is None or record["media_id"] != media.get("id"):
+                return True
+        next_ep = media.get("nextAiringEpisode")
+        next_episode = (next_ep["episode"] + offset, next_ep["airingAt"]) if next_ep else None
+        return shifted(self.schedule(mal_id, offset) or [], next_episode, time.time() if now is None else now)
+
+    def update(self, mal_id, media_id, offset, rows, now=None):
+        """Replace mal_id's schedule with AniList airingSchedules rows."""
+        schedule = sorted(([row["episode"] + offset, row["airingAt"]] for row in rows), key=_airing_at)
+        with self.lock:
+            self.titles[mal_id] = {
+                "media_id": media_id,
+                "offset": offset,
+                "schedule": schedule,
+                "synced_at": time.time() if now is None else now
+            }
+            self.dirty = True
+
+    def prune(self, keep_ids):
+        with self.lock:
+            for mal_id in [mal_id for mal_id in self.titles if mal_id not in keep_ids]:
+                del self.titles[mal_id]
+                self.dirty = True
@@ -0,0 +1,212 @@
+"""Lightweight span tracing for refreshes, fetch phases and HTTP calls.
+
+Off unless TRACING is set in auth/config.py. While off, span() hands back
+one shared no-op object and annotate() returns at once, so instrumented code
+pays for a function call and nothing else.
+
+    with tracing.span("fetch.airing", titles=len(ids)):
+        ...
+    tracing.annotate(cache="hit")   # tag the innermost open span on this thread
+
+Finished spans go into a ring buffer of TRACE_BUFFER_SIZE records. Each one
+is tagged with the refresh that was current when it started, so cover loads
+that finish after a refresh still count towards it.
+"""
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+from auth import config
+
+enabled = getattr(config, "TRACING", False)
+
+_spans = deque(maxlen=getattr(config, "TRACE_BUFFER_SIZE", 5000))
+_ids = itertools.count(1)
+_local = threading.local()
+current_refresh = None
+
+class Span:
+    __slots__ = ("id", "name", "attrs", "refresh", "parent", "start", "wall_start")
+
+    def __init__(self, name, attrs):
+        self.id = next(_ids)
+        self.name = name
+        self.attrs = attrs
+        self.refresh = current_refresh
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1].id if stack else None
+        stack.append(self)
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        _spans.append({
+            "id": self.id,
+            "parent": self.parent,
+            "refresh": self.refresh,
+            "name": self.name,
+            "start": self.wall_start,
+            "ms": duration * 1000,
+            **self.attrs
+        })
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+class NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+NO_SPAN = NoSpan()
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def span(name, **attrs):
+    if not enabled:
+        return NO_SPAN
+    return Span(name, attrs)
+
+def annotate(**attrs):
+    """Add attributes to the innermost open span on the calling thread."""
+    if not enabled:
+        return
+    stack = _stack()
+    if stack:
+        stack[-1].attrs.update(attrs)
+
+def begin_refresh(kind):
+    """Start a new refresh; spans opened from now on on any thread belong to it."""
+    global current_refresh
+    if not enabled:
+        return
+    current_refresh = next(_ids)
+    _spans.append({"id": current_refresh, "parent": None, "refresh": current_refresh,
+                   "name": "refresh", "start": time.time(), "ms": 0.0, "kind": kind})
+
+def records():
+    return list(_spans)
+
+def clear():
+    _spans.clear()
+
+def export_jsonl(path):
+    """Write the buffered spans to path, one JSON object per line."""
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records():
+            f.write(json.dumps(record) + "\n")
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def host_stats(spans=None):
+    """{host: {count, errors, bytes, p50, p95, max}} over the buffered HTTP spans."""
+    by_host = {}
+    for record in spans if spans is not None else records():
+        if record["name"] == "http":
+            by_host.setdefault(record.get("host"), []).append(record)
+    stats = {}
+    for host, calls in by_host.items():
+        latencies = [call["ms"] for call in calls]
+        stats[host] = {
+            "count": len(calls),
+            "errors": sum(1 for call in calls if call.get("error") or call.get("status", 0) >= 400),
+            "bytes": sum(call.get("bytes", 0) for call in calls),
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "max": max(latencies)
+        }
+    return stats
+
+def refresh_breakdowns(limit=5, spans=None):
+    """Per-refresh totals for the most recent refreshes, newest first."""
+    spans = spans if spans is not None else records()
+    refreshes = {}
+    for record in spans:
+        if record["name"] == "refresh":
+            refreshes[record["id"]] = {
+                "id": record["id"], "kind": record.get("kind"), "start": record["start"],
+                "fetch_ms": 0.0, "phases": {}, "requests": 0, "bytes": 0,
+                "build_ms": 0.0, "covers": 0, "cover_ms": 0.0, "cover_hits": 0, "cover_end": None
+            }
+    for record in spans:
+        breakdown = refreshes.get(record["refresh"])
+        if breakdown is None or record["name"] == "refresh":
+            continue
+        name = record["name"]
+        if name == "fetch":
+            breakdown["fetch_ms"] += record["ms"]
+        elif name.startswith("fetch."):
+            breakdown["phases"][name[6:]] = breakdown["phases"].get(name[6:], 0.0) + record["ms"]
+        elif name == "http":
+            breakdown["requests"] += 1
+            breakdown["bytes"] += record.get("bytes", 0)
+        elif name == "board.build":
+            breakdown["build_ms"] += record["ms"]
+        elif name == "cover.load":
+            breakdown["covers"] += 1
+            breakdown["cover_ms"] += record["ms"]
+            breakdown["cover_hits"] += record.get("cache") == "hit"
+            end = record["start"] + record["ms"] / 1000
+            breakdown["cover_end"] = max(breakdown["cover_end"] or end, end)
+    result = sorted(refreshes.values(), key=lambda b: b["id"], reverse=True)[:limit]
+    for breakdown in result:
+        end = breakdown.pop("cover_end")
+        breakdown["cover_wall_ms"] = (end - breakdown["start"]) * 1000 if end else 0.0
+    return result
+
+def summary_text():
+    """Plain-text report of recent refreshes and per-host latency percentiles."""
+    if not enabled:
+        return "Tracing is off. Set TRACING = True in auth/config.py and restart."
+    spans = records()
+    lines = ["Recent refreshes (newest first)"]
+    for b in refresh_breakdowns(spans=spans):
+        started = time.strftime("%H:%M:%S", time.localtime(b["start"]))
+        lines.append(
+            f"  {started} {b['kind']:<11} fetch {b['fetch_ms']:7.0f} ms  build {b['build_ms']:6.0f} ms  "
+            f"{b['requests']} requests, {b['bytes'] / 1024:.0f} KiB"
+        )
+        if b["phases"]:
+            lines.append("      " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in b["phases"].items()))
+        if b["covers"]:
+            lines.append(
+                f"      covers: {b['covers']} loaded ({b['cover_hits']} from disk), "
+                f"{b['cover_ms']:.0f} ms total, last one {b['cover_wall_ms']:.0f} ms after the refresh began"
+            )
+    lines.append("")
+    lines.append(f"{'host':<24} {'calls':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'KiB':>8}")
+    for host, s in sorted(host_stats(spans).items(), key=lambda item: str(item[0])):
+        lines.append(
+            f"{str(host):<24} {s['count']:>6} {s['errors']:>6} {s['p50']:>8.0f} {s['p95']:>8.0f} "
+            f"{s['max']:>8.0f} {s['bytes'] / 1024:>8.0f}"
+        )
+    lines.append("")
+    lines.append(f"{len(spans)} spans buffered")
+    return "\n".join(lines)
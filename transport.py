@@ -0,0 +1,82 @@
+"""Shared HTTP transport: one pooled session, timeouts, compression, base URLs.
+
+Every outgoing request goes through send() (ratelimit.request calls it), so
+connections to each host are kept alive and reused across calls and threads
+instead of paying TCP and TLS setup every time.
+
+Services are addressed by name and their base URLs looked up at call time,
+so set_base_url() (or BASE_URLS in auth/config.py) can point one at the
+stand-in server in benchmarks/standin.py:
+
+    transport.url("mal", "/anime/1")   # https://api.myanimelist.net/v2/anime/1
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from auth import config
+
+DEFAULT_BASE_URLS = {
+    "mal": "https://api.myanimelist.net/v2",
+    "anilist": "https://graphql.anilist.co",
+    "oauth": "https://myanimelist.net/v1/oauth2",
+}
+
+base_urls = {**DEFAULT_BASE_URLS, **getattr(config, "BASE_URLS", {})}
+
+USER_AGENT = "MAL-Seasonals (+https://github.com/shiokon/MAL-Seasonals)"
+
+_session = None
+_session_lock = threading.Lock()
+
+def url(service, path=""):
+    return base_urls[service] + path
+
+def set_base_url(service, base_url):
+    base_urls[service] = base_url.rstrip("/")
+
+def timeouts():
+    """(connect, read) timeout in seconds."""
+    return (getattr(config, "HTTP_CONNECT_TIMEOUT", 5), getattr(config, "HTTP_READ_TIMEOUT", 30))
+
+def new_session():
+    session = requests.Session()
+    # Enough connections per host for the fetch pool and the cover loads running at once;
+    # retrying is ratelimit.request's job
+    pool_size = getattr(config, "HTTP_POOL_SIZE", 16)
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": getattr(config, "USER_AGENT", USER_AGENT),
+        "Accept-Encoding": "gzip, deflate"
+    })
+    return session
+
+def session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = new_session()
+        return _session
+
+def close():
+    """Drop every pooled connection. The next request opens new ones."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def send(method, url, **kwargs):
+    """requests.request over the shared session, with the default timeouts unless given.
+
+    With HTTP_KEEP_ALIVE off every request gets a fresh connection, as with
+    bare requests.request.
+    """
+    kwargs.setdefault("timeout", timeouts())
+    if not getattr(config, "HTTP_KEEP_ALIVE", True):
+        with new_session() as one_off:
+            return one_off.request(method, url, **kwargs)
+    return session().request(method, url, **kwargs)
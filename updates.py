@@ -0,0 +1,59 @@
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from auth import config
+from mal import submit_update
+from tasks import start_task
+
+class EpisodeUpdateQueue(QObject):
+    """Debounced per-title write queue for list status changes.
+
+    Repeated changes to the same title within the debounce window collapse
+    into a single PUT carrying the latest value. A title never has more than
+    one write in flight; changes made meanwhile are sent once it finishes.
+    submit(anime_id, payload, attempts) performs the write, submit_update by
+    default.
+    """
+    confirmed = pyqtSignal(int, object)
+    failed = pyqtSignal(int, object)
+
+    def __init__(self, delay_ms=None, submit=None, parent=None):
+        super().__init__(parent)
+        self.submit = submit or submit_update
+        self.pending = {}
+        self.in_flight = set()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms if delay_ms is not None else getattr(config, "UPDATE_DEBOUNCE_MS", 800))
+        self.timer.timeout.connect(self.flush)
+
+    def enqueue(self, anime_id, payload):
+        self.pending[anime_id] = payload
+        self.timer.start()
+
+    def flush(self):
+        for anime_id in list(self.pending):
+            if anime_id in self.in_flight:
+                continue
+            payload = self.pending.pop(anime_id)
+            self.in_flight.add(anime_id)
+            start_task(
+                self.submit, anime_id, payload, getattr(config, "UPDATE_RETRIES", 3),
+                on_result=self.on_submitted,
+                on_error=lambda e, anime_id=anime_id: self.on_failed(anime_id, e)
+            )
+
+    def on_submitted(self, result):
+        anime_id, list_status = result
+        self.in_flight.discard(anime_id)
+        if anime_id in self.pending:
+            # A newer change arrived while this one was in flight
+            self.timer.start()
+            return
+        self.confirmed.emit(anime_id, list_status)
+
+    def on_failed(self, anime_id, error):
+        self.in_flight.discard(anime_id)
+        if anime_id in self.pending:
+            self.timer.start()
+            return
+        self.failed.emit(anime_id, error)
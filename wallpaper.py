@@ -1,19 +1,41 @@
 import sys
 import ctypes
-import requests
 import math
-import win32gui
+import threading
+import time
+import tracemalloc
+import requests
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton,
     QGridLayout, QVBoxLayout, QHBoxLayout, QScrollArea, QSizePolicy,
-    QSystemTrayIcon, QMenu
+    QSystemTrayIcon, QMenu, QDialog, QPlainTextEdit, QDialogButtonBox, QFileDialog
 )
-from PyQt6.QtGui import QPixmap, QImage, QIcon, QAction, QCursor
-from PyQt6.QtCore import Qt
-from mal import fetch_anime_data
+from PyQt6.QtGui import QPixmap, QIcon, QAction, QCursor, QFontDatabase
+from PyQt6.QtCore import Qt, QObject, QTimer, pyqtSignal, pyqtSlot
+from mal import (
+    fetch_anime_data, iter_anime_data, assemble_board, board_items, merge_board_entries,
+    entry_status, resolve_anilist_info, apply_airing_info, update_countdown, submit_update
+)
+from auth import config
+import covers
+import memstats
+import tracing
+from tasks import start_task, start_stream
+from updates import EpisodeUpdateQueue
+from scheduler import AiringScheduler
+from snapshot import load_snapshot, save_snapshot
+from board_view import AnimeListModel, AnimeCardDelegate, make_day_view
+from daemon import DaemonClient, DaemonError
+
+def card_data(anime):
+    """The subset of a board entry that AnimeWidget displays."""
+    anime_copy = anime.copy()
+    for key in ("weekday_idx", "airing_at", "episode_offset", "schedule"):
+        anime_copy.pop(key, None)
+    return anime_copy
 
 class AnimeWidget(QWidget):
-    def __init__(self, title, mal_id, watched_eps, total_eps, next_in_hours, status, cover_url, score):
+    def __init__(self, title, mal_id, watched_eps, total_eps, next_in_hours, status, cover_url, score, next_episode=None):
         super().__init__()
         self.title = title
         self.anime_id = mal_id
@@ -27,6 +49,7 @@ class AnimeWidget(QWidget):
         self.current_eps = watched_eps
         self.cover_url = cover_url
         self.score = score
+        self.next_episode = next_episode
 
         layout = QVBoxLayout()
         layout.setContentsMargins(4, 4, 4, 4)
@@ -35,15 +58,8 @@ class AnimeWidget(QWidget):
         self.cover_label = QLabel()
         self.cover_label.setFixedSize(160, 224)
         self.cover_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        pixmap = self.get_pixmap_from_url(cover_url)
-        if pixmap:
-            self.cover_label.setPixmap(
-                pixmap.scaled(
-                    160, 224,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-            )
+        self.cover_task = None
+        self.load_cover(cover_url)
         layout.addWidget(self.cover_label, alignment=Qt.AlignmentFlag.AlignCenter)
 
         button_bar_widget = QWidget()
@@ -75,7 +91,7 @@ class AnimeWidget(QWidget):
 
         self.minus_button.clicked.connect(self.decrease_episode)
         self.plus_button.clicked.connect(self.increase_episode)
-        self.equal_button.clicked.connect(self.submit_and_refresh)
+        self.equal_button.clicked.connect(self.submit_episodes)
 
         button_bar_layout.addWidget(self.minus_button)
         button_bar_layout.addWidget(self.equal_button)
@@ -85,8 +101,8 @@ class AnimeWidget(QWidget):
 
 
         # Title
-        color = "lime" if status == "GREEN" else "tomato"
-        self.title_label = QLabel(f'<b><span style="color:{color};">{title}</span></b>')
+        self.status = status
+        self.title_label = QLabel(self.title_markup())
         self.title_label.setWordWrap(True)
         self.title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.title_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum)
@@ -99,8 +115,8 @@ class AnimeWidget(QWidget):
         layout.addWidget(self.eps_label)
 
         # Countdown
-        countdown_text = f"Next in {math.floor(next_in_hours/24)}d {next_in_hours%24}h" if next_in_hours is not None else "Next: ?"
-        self.countdown_label = QLabel(countdown_text)
+        self.next_in_hours = next_in_hours
+        self.countdown_label = QLabel(self.countdown_text())
         self.countdown_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.countdown_label)
 
@@ -108,15 +124,78 @@ class AnimeWidget(QWidget):
         self.setFixedHeight(320)
         self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
 
-    def get_pixmap_from_url(self, url):
+    def title_markup(self):
+        color = "lime" if self.status == "GREEN" else "tomato"
+        return f'<b><span style="color:{color};">{self.title}</span></b>'
+
+    def countdown_text(self):
+        if self.next_in_hours is None:
+            return "Next: ?"
+        return f"Next in {math.floor(self.next_in_hours/24)}d {self.next_in_hours%24}h"
+
+    def update_data(self, title, mal_id, watched_eps, total_eps, next_in_hours, status, cover_url, score, next_episode=None):
+        """Apply fresh data to an existing card, touching only what changed."""
+        self.anime_id = mal_id
+        self.score = score
+        self.next_episode = next_episode
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            image = QImage.fromData(response.content)
-            return QPixmap.fromImage(image)
-        except Exception as e:
-            print(f"Failed to load image {url}: {e}")
-            return None
+            total_eps = int(total_eps)
+        except (TypeError, ValueError):
+            total_eps = None
+
+        if title != self.title or status != self.status:
+            self.title = title
+            self.status = status
+            self.title_label.setText(self.title_markup())
+
+        if watched_eps != self.original_eps or total_eps != self.total_eps:
+            self.original_eps = watched_eps
+            self.current_eps = watched_eps
+            self.total_eps = total_eps
+            self.update_eps_label()
+
+        if next_in_hours != self.next_in_hours:
+            self.next_in_hours = next_in_hours
+            self.countdown_label.setText(self.countdown_text())
+
+        if cover_url != self.cover_url:
+            self.cover_url = cover_url
+            self.load_cover(cover_url)
+
+    def load_cover(self, url):
+        """Show the cover for url, loading it on the thread pool if it is not cached."""
+        self.cancel_cover_load()
+        if not url:
+            return
+        pixmap = covers.cached_pixmap(url)
+        if pixmap is not None:
+            self.cover_label.setStyleSheet("")
+            self.cover_label.setPixmap(pixmap)
+            return
+
+        self.cover_label.setStyleSheet("background-color: #1e1e1e;")
+        self.cover_task = start_task(
+            covers.load_cover_image, url,
+            on_result=self.on_cover_loaded,
+            on_error=lambda e: print(f"Failed to load image {url}: {e}")
+        )
+
+    def cancel_cover_load(self):
+        if self.cover_task is not None:
+            self.cover_task.cancel()
+            self.cover_task = None
+
+    @pyqtSlot(object)
+    def on_cover_loaded(self, image):
+        # Ignore results from a load that was superseded after it emitted
+        if self.cover_task is None or self.sender() is not self.cover_task.signals:
+            return
+        url = self.cover_task.args[0]
+        self.cover_task = None
+        pixmap = QPixmap.fromImage(image)
+        covers.store_pixmap(url, pixmap)
+        self.cover_label.setStyleSheet("")
+        self.cover_label.setPixmap(pixmap)
 
     def increase_episode(self):
         if self.total_eps is None or self.current_eps < self.total_eps:
@@ -134,32 +213,41 @@ class AnimeWidget(QWidget):
         self.eps_label.setText(f"{self.current_eps}/{total} episodes")
 
 
-    def submit_and_refresh(self):
+    def submit_episodes(self):
         if not self.anime_id:
             print(f"Could not determine MAL ID for {self.title}")
             return
-
-        from auth.tokenrefresh import load_tokens
-        token = load_tokens()["access_token"]
-
-        status = "completed" if self.current_eps == self.total_eps else "watching"
-        payload = {
-            "status": status,
-            "score": self.score,
-            "num_watched_episodes": self.current_eps
-        }
-
-        url = f"https://api.myanimelist.net/v2/anime/{self.anime_id}/my_list_status"
-        headers = {"Authorization": f"Bearer {token}"}
-
-        try:
-            response = requests.put(url, headers=headers, data=payload)
-            response.raise_for_status()
-            # print(f"Updated {self.title} to {self.current_eps} episodes watched.")
-            self.parentWidget().parentWidget().parentWidget().window().refresh_data()
-        except Exception as e:
-            print(f"Failed to update MAL status: {e}")
-
+        self.window().queue_episode_update(self.anime_id, self.current_eps)
+
+
+class DaemonWatcher(QObject):
+    """Long-polls the board daemon on a background thread and emits every new board."""
+    board_changed = pyqtSignal(object)
+    connection_changed = pyqtSignal(bool)
+
+    def __init__(self, client, parent=None):
+        super().__init__(parent)
+        self.client = client
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        connected = None
+        while True:
+            try:
+                anime_by_day = self.client.wait_for_change(getattr(config, "DAEMON_POLL_SECONDS", 50))
+            except Exception:
+                if connected is not False:
+                    connected = False
+                    self.connection_changed.emit(False)
+                time.sleep(getattr(config, "DAEMON_RETRY_SECONDS", 30))
+                continue
+            if connected is not True:
+                connected = True
+                self.connection_changed.emit(True)
+            if anime_by_day is not None:
+                self.board_changed.emit(anime_by_day)
 
 class MainWindow(QWidget):
     def __init__(self):
@@ -169,6 +257,48 @@ class MainWindow(QWidget):
 
         self.main_layout = QHBoxLayout()
         self.day_columns = []
+        self.anime_widgets = {}
+        self.anime_by_day = [[] for _ in range(7)]
+        self.confirmed_eps = {}
+        # MAL's list status after each confirmed write, with the write's generation. It wins
+        # over refreshes that started before the write and is dropped by the first that started
+        # after, or by any daemon board.
+        self.confirmed_status = {}
+        self.write_generation = 0
+        self.refresh_write_mark = 0
+
+        # Read the board from a running daemon (python mal.py --daemon) when there is one
+        self.daemon = DaemonClient() if getattr(config, "USE_DAEMON", True) else None
+        self.daemon_connected = False
+
+        self.update_queue = EpisodeUpdateQueue(submit=self.submit_update, parent=self)
+        self.update_queue.confirmed.connect(self.on_update_confirmed)
+        self.update_queue.failed.connect(self.on_update_failed)
+        self.scheduler = AiringScheduler(self)
+        self.last_refresh_stats = {"reused": 0, "created": 0, "removed": 0}
+
+        # At most one refresh in flight. Results carrying an older generation are
+        # discarded; followup_refresh is None, or the force flag of the next refresh.
+        self.refresh_task = None
+        self.refresh_flight = None
+        self.refresh_generation = 0
+        self.followup_refresh = None
+        self.refresh_indicator = QLabel("Refreshing…", self)
+        self.refresh_indicator.setObjectName("refreshIndicator")
+        self.refresh_indicator.hide()
+
+        # Streamed refreshes: entries that arrive close together are applied as one batch
+        self.stream_pending = []
+        self.stream_timer = QTimer(self)
+        self.stream_timer.setSingleShot(True)
+        self.stream_timer.setInterval(30)
+        self.stream_timer.timeout.connect(self.apply_stream_batch)
+
+        # "delegate" paints every card from one shared model instead of a widget per title
+        self.board_model = None
+        if getattr(config, "RENDER_MODE", "widgets") == "delegate":
+            self.board_model = AnimeListModel(self)
+            self.card_delegate = AnimeCardDelegate(self.board_model, self.queue_episode_update, self)
 
         days = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
         for i, day in enumerate(days):
@@ -178,6 +308,12 @@ class MainWindow(QWidget):
             day_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
             day_layout.addWidget(day_label)
 
+            if self.board_model is not None:
+                day_layout.addWidget(make_day_view(self.board_model, self.card_delegate, i, day_widget))
+                day_widget.setLayout(day_layout)
+                self.main_layout.addWidget(day_widget)
+                continue
+
             scroll_area = QScrollArea()
             scroll_area.setWidgetResizable(True)
             content_widget = QWidget()
@@ -202,39 +338,392 @@ class MainWindow(QWidget):
         layout.addLayout(self.main_layout)
         self.setLayout(layout)
 
-        self.refresh_data()
-
-    def refresh_data(self):
-        for col in self.day_columns:
-            while col.count():
-                item = col.takeAt(0)
-                widget = item.widget()
-                if widget:
-                    widget.deleteLater()
-
-        anime_by_day = self.get_anime_data()
+        # Render the last known board immediately, then revalidate it
+        snapshot = load_snapshot()
+        if snapshot is not None:
+            self.apply_anime_data(snapshot)
+            self.refresh_data(kind="revalidate")
+        else:
+            self.refresh_data()
+
+        if self.daemon is not None:
+            self.daemon_watcher = DaemonWatcher(self.daemon, self)
+            self.daemon_watcher.board_changed.connect(self.on_daemon_board)
+            self.daemon_watcher.connection_changed.connect(self.on_daemon_connection)
+            self.daemon_watcher.start()
+
+    def refresh_data(self, force_refresh=False, kind=None):
+        """Refresh the board on a worker thread. Returns at once.
+
+        One refresh runs at a time. Requests made while it is in flight merge
+        into a single follow-up, a full refresh if any of them asked for one.
+        With STREAM_REFRESH on, new titles appear from their MAL data within
+        one round trip and fill in their airing info as it arrives; titles
+        already shown keep their card until their resolved entry replaces it.
+        """
+        if self.refresh_task is not None:
+            self.followup_refresh = bool(self.followup_refresh) or force_refresh
+            return None
+        tracing.begin_refresh(kind or ("full refresh" if force_refresh else "refresh"))
+        self.refresh_generation += 1
+        generation = self.refresh_generation
+        self.refresh_write_mark = self.write_generation
+        self.stream_pending = []
+        on_error = lambda e: print(f"Failed to refresh board: {e}")
+        on_finished = lambda: self.finish_refresh(generation)
+        if getattr(config, "STREAM_REFRESH", True):
+            self.refresh_task = start_stream(
+                self.iter_anime_data, force_refresh,
+                on_item=lambda item: self.on_stream_item(generation, item),
+                on_result=lambda items: self.on_stream_done(generation, items),
+                on_error=on_error, on_finished=on_finished
+            )
+        else:
+            self.refresh_task = start_task(
+                self.get_anime_data, force_refresh,
+                on_result=lambda anime_by_day: self.on_refresh_done(generation, anime_by_day),
+                on_error=on_error, on_finished=on_finished
+            )
+        self.refresh_flight = generation
+        self.set_refreshing(True)
+        return self.refresh_task
+
+    def finish_refresh(self, generation):
+        if generation != self.refresh_flight:
+            return  # Cancelled, and the cancel already cleaned up
+        self.refresh_task = None
+        self.refresh_flight = None
+        self.set_refreshing(False)
+        if self.followup_refresh is not None:
+            force_refresh, self.followup_refresh = self.followup_refresh, None
+            self.refresh_data(force_refresh)
+
+    def cancel_refresh(self):
+        """Stop waiting for the refresh in flight and drop any follow-up. Its results are discarded."""
+        if self.refresh_task is not None:
+            self.refresh_task.cancel()
+            self.refresh_task = None
+            self.refresh_flight = None
+        self.refresh_generation += 1
+        self.followup_refresh = None
+        self.stream_timer.stop()
+        self.stream_pending = []
+        self.set_refreshing(False)
+
+    def set_refreshing(self, refreshing):
+        if refreshing:
+            self.place_refresh_indicator()
+            self.refresh_indicator.raise_()
+        self.refresh_indicator.setVisible(refreshing)
+
+    def place_refresh_indicator(self):
+        self.refresh_indicator.adjustSize()
+        self.refresh_indicator.move(self.width() - self.refresh_indicator.width() - 12, 8)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.place_refresh_indicator()
+
+    def on_refresh_done(self, generation, anime_by_day):
+        if generation != self.refresh_generation:
+            return
+        self.on_board_fetched(anime_by_day, self.refresh_write_mark)
 
-        for i, anime_list in enumerate(anime_by_day):
-            if i == 0:
-                for idx, anime in enumerate(anime_list):
-                    anime_copy = anime.copy()
-                    anime_copy.pop("weekday_idx", None)
-                    widget = AnimeWidget(**anime_copy)
-                    widget.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Maximum)
-                    row, col = divmod(idx, 2)
-                    self.day_columns[i].addWidget(widget, row, col)
-            else:
-                for anime in anime_list:
-                    anime_copy = anime.copy()
-                    anime_copy.pop("weekday_idx", None)
+    def on_stream_item(self, generation, item):
+        if generation != self.refresh_generation:
+            return
+        self.stream_pending.append(item)
+        if not self.stream_timer.isActive():
+            self.stream_timer.start()
+
+    def apply_stream_batch(self):
+        entries = [
+            anime for position, anime, final in self.stream_pending
+            if final or self.find_entry(anime["mal_id"]) is None
+        ]
+        self.stream_pending = []
+        if entries:
+            with tracing.span("board.stream", entries=len(entries)):
+                self.apply_anime_data(merge_board_entries(self.anime_by_day, entries), self.refresh_write_mark)
+
+    def on_stream_done(self, generation, items):
+        if generation != self.refresh_generation:
+            return
+        self.stream_timer.stop()
+        self.stream_pending = []
+        self.on_board_fetched(assemble_board(items), self.refresh_write_mark)
+
+    def on_daemon_board(self, anime_by_day):
+        # Newer than anything a refresh still in flight could return
+        self.refresh_generation += 1
+        self.stream_timer.stop()
+        self.stream_pending = []
+        # The daemon folds confirmed writes into its board itself
+        self.confirmed_status = {}
+        tracing.begin_refresh("daemon")
+        self.on_board_fetched(anime_by_day)
+
+    def on_daemon_connection(self, connected):
+        self.daemon_connected = connected
+        print("Using the board daemon" if connected else "Board daemon not reachable, fetching in-process")
+
+    def on_board_fetched(self, anime_by_day, write_mark=None):
+        with tracing.span("board.build") as span:
+            stats = self.apply_anime_data(anime_by_day, write_mark)
+            span.set(**stats)
+        with tracing.span("board.snapshot"):
+            save_snapshot(self.anime_by_day)
+        return stats
+
+    def apply_anime_data(self, anime_by_day, write_mark=None):
+        """Reconcile the board with anime_by_day, keyed by MAL ID.
+
+        write_mark is write_generation when the fetch behind anime_by_day
+        started, or None if unknown. Writes confirmed since then override it.
+        """
+        if write_mark is not None:
+            self.confirmed_status = {
+                mal_id: (generation, list_status)
+                for mal_id, (generation, list_status) in self.confirmed_status.items() if generation > write_mark
+            }
+        anime_by_day = [
+            [anime for anime in anime_list if not self.confirmed_dropped(anime["mal_id"])]
+            for anime_list in anime_by_day
+        ]
+        for anime_list in anime_by_day:
+            for anime in anime_list:
+                if anime["mal_id"] in self.confirmed_eps:
+                    # Keep optimistic episode counts for titles with writes still pending
+                    local = self.find_entry(anime["mal_id"])
+                    if local is not None:
+                        anime["watched_eps"] = local["watched_eps"]
+                        anime["status"] = entry_status(anime)
+                elif anime["mal_id"] in self.confirmed_status:
+                    _, list_status = self.confirmed_status[anime["mal_id"]]
+                    anime["score"] = list_status.get("score", anime["score"])
+                    anime["watched_eps"] = list_status.get("num_episodes_watched", anime["watched_eps"])
+                    anime["status"] = entry_status(anime)
+
+        self.anime_by_day = anime_by_day
+        if self.board_model is not None:
+            self.last_refresh_stats = self.board_model.set_entries(anime_by_day)
+        else:
+            self.last_refresh_stats = self.reconcile_widgets(anime_by_day)
+        self.scheduler.reschedule()
+        return self.last_refresh_stats
+
+    def confirmed_dropped(self, mal_id):
+        """True if a confirmed write took mal_id off the watching list."""
+        confirmed = self.confirmed_status.get(mal_id)
+        return confirmed is not None and confirmed[1].get("status") != "watching"
+
+    def reconcile_widgets(self, anime_by_day):
+        """Existing cards are updated in place and moved between day columns as
+        needed; only new titles get a new AnimeWidget.
+        """
+        if not getattr(config, "INCREMENTAL_REFRESH", True):
+            self.clear_widgets()
+
+        reused = created = removed = 0
+        wanted_by_day = []
+        for anime_list in anime_by_day:
+            wanted = []
+            for anime in anime_list:
+                anime_copy = card_data(anime)
+                widget = self.anime_widgets.get(anime_copy["mal_id"])
+                if widget is None:
                     widget = AnimeWidget(**anime_copy)
                     widget.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Maximum)
-                    self.day_columns[i].addWidget(widget)
+                    self.anime_widgets[anime_copy["mal_id"]] = widget
+                    created += 1
+                else:
+                    widget.update_data(**anime_copy)
+                    reused += 1
+                wanted.append(widget)
+            wanted_by_day.append(wanted)
+
+        wanted_ids = {widget.anime_id for wanted in wanted_by_day for widget in wanted}
+        for mal_id in list(self.anime_widgets):
+            if mal_id not in wanted_ids:
+                widget = self.anime_widgets.pop(mal_id)
+                for col in self.day_columns:
+                    col.removeWidget(widget)
+                widget.cancel_cover_load()
+                widget.deleteLater()
+                removed += 1
+
+        # Detach cards that belong to another column before re-adding any
+        for i, col in enumerate(self.day_columns):
+            wanted = set(wanted_by_day[i]) if i < len(wanted_by_day) else set()
+            for widget in self.column_widgets(col):
+                if widget not in wanted:
+                    col.removeWidget(widget)
+
+        for i, wanted in enumerate(wanted_by_day):
+            self.place_widgets(i, wanted)
+
+        return {"reused": reused, "created": created, "removed": removed}
+
+    def update_card(self, anime):
+        """Show the current state of one entry on its card."""
+        if self.board_model is not None:
+            self.board_model.update_entry(anime)
+            return
+        widget = self.anime_widgets.get(anime["mal_id"])
+        if widget:
+            widget.update_data(**card_data(anime))
+
+    def all_entries(self):
+        return [anime for anime_list in self.anime_by_day for anime in anime_list]
+
+    def tick_countdowns(self):
+        """Advance countdown labels locally from the stored airing times."""
+        now = time.time()
+        for anime in self.all_entries():
+            if update_countdown(anime, now):
+                self.update_card(anime)
+
+    def refresh_airing(self, mal_ids):
+        """Re-query AniList for just mal_ids in the background and apply the result."""
+        if self.daemon_connected:
+            # The daemon refetches after each airing and the watcher delivers the result
+            return None
+        if self.refresh_task is not None:
+            return None  # The refresh in flight brings airing info for every title
+        tracing.begin_refresh("airing")
+        return start_task(resolve_anilist_info, list(mal_ids), on_result=self.apply_airing_results,
+                          on_error=lambda e: print(f"Failed to refresh airing info: {e}"))
+
+    def apply_airing_results(self, anilist_by_mal_id):
+        now = time.time()
+        shifted = False
+        for mal_id, anilist_info in anilist_by_mal_id.items():
+            anime = self.find_entry(mal_id)
+            if anime is None:
+                continue
+            shifted = apply_airing_info(anime, anilist_info, now) or shifted
+            self.update_card(anime)
+        self.scheduler.reschedule()
+        if shifted:
+            # A delay or a break: refetch so the airing timeline is resynced
+            self.refresh_data(kind="schedule shift")
+
+    def find_entry(self, mal_id):
+        for anime_list in self.anime_by_day:
+            for anime in anime_list:
+                if anime["mal_id"] == mal_id:
+                    return anime
+        return None
+
+    def set_watched_eps(self, anime, watched_eps):
+        """Update one entry of the local model and its card."""
+        anime["watched_eps"] = watched_eps
+        anime["status"] = entry_status(anime)
+        self.update_card(anime)
+
+    def queue_episode_update(self, mal_id, watched_eps):
+        """Apply an episode change locally right away and queue the MAL write."""
+        anime = self.find_entry(mal_id)
+        if anime is None:
+            return
+        self.confirmed_eps.setdefault(mal_id, anime["watched_eps"])
+        self.set_watched_eps(anime, watched_eps)
 
-    def get_anime_data(self):
-        return fetch_anime_data()
+        status = "completed" if watched_eps == anime["total_eps"] else "watching"
+        payload = {
+            "status": status,
+            "score": anime["score"],
+            "num_watched_episodes": watched_eps
+        }
+        self.update_queue.enqueue(mal_id, payload)
+
+    def on_update_confirmed(self, mal_id, list_status):
+        self.confirmed_eps.pop(mal_id, None)
+        self.write_generation += 1
+        if list_status:
+            self.confirmed_status[mal_id] = (self.write_generation, list_status)
+        anime = self.find_entry(mal_id)
+        if anime is None or not list_status:
+            return
+        if list_status.get("status") != "watching":
+            # No longer on the watching list, so drop it like a full refresh would
+            self.apply_anime_data([
+                [entry for entry in anime_list if entry["mal_id"] != mal_id]
+                for anime_list in self.anime_by_day
+            ])
+            return
+        anime["score"] = list_status.get("score", anime["score"])
+        self.set_watched_eps(anime, list_status.get("num_episodes_watched", anime["watched_eps"]))
+
+    def on_update_failed(self, mal_id, error):
+        print(f"Failed to update MAL status: {error}")
+        original_eps = self.confirmed_eps.pop(mal_id, None)
+        anime = self.find_entry(mal_id)
+        if anime is not None and original_eps is not None:
+            self.set_watched_eps(anime, original_eps)
+
+    def column_widgets(self, col):
+        return [col.itemAt(k).widget() for k in range(col.count()) if col.itemAt(k).widget()]
+
+    def place_widgets(self, day, widgets):
+        col = self.day_columns[day]
+        if self.column_widgets(col) == widgets:
+            return
+        for widget in self.column_widgets(col):
+            col.removeWidget(widget)
+        for idx, widget in enumerate(widgets):
+            if day == 0:
+                row, column = divmod(idx, 2)
+                col.addWidget(widget, row, column)
+            else:
+                col.addWidget(widget)
+            widget.show()
+
+    def clear_widgets(self):
+        for widget in self.anime_widgets.values():
+            for col in self.day_columns:
+                col.removeWidget(widget)
+            # Cancel here: a destroyed signal never reaches the dying widget's own slots
+            widget.cancel_cover_load()
+            widget.deleteLater()
+        self.anime_widgets.clear()
+
+    def iter_anime_data(self, force_refresh=False):
+        """Board items as they resolve. A daemon's board arrives in one piece."""
+        if self.daemon is not None:
+            try:
+                yield from board_items(self.daemon.refresh(force_refresh))
+                return
+            except requests.ConnectionError:
+                pass  # No daemon running, fetch in-process
+            except (requests.RequestException, DaemonError) as e:
+                print(f"Daemon refresh failed ({e}), fetching in-process")
+        yield from iter_anime_data(force_refresh=force_refresh)
+
+    def get_anime_data(self, force_refresh=False):
+        if self.daemon is not None:
+            try:
+                return self.daemon.refresh(force_refresh)
+            except requests.ConnectionError:
+                pass  # No daemon running, fetch in-process
+            except (requests.RequestException, DaemonError) as e:
+                print(f"Daemon refresh failed ({e}), fetching in-process")
+        return fetch_anime_data(force_refresh=force_refresh)
+
+    def submit_update(self, anime_id, payload, attempts):
+        """Write a list status change, through the daemon when one is running. Runs off the GUI thread."""
+        if self.daemon is not None:
+            try:
+                return self.daemon.submit_update(anime_id, payload)
+            except requests.ConnectionError:
+                pass
+            except (requests.RequestException, DaemonError) as e:
+                print(f"Daemon write failed ({e}), writing in-process")
+        return submit_update(anime_id, payload, attempts)
 
 def set_as_wallpaper(window):
+    import win32gui
+
     hwnd_progman = ctypes.windll.user32.FindWindowW("Progman", None)
     ctypes.windll.user32.SendMessageTimeoutW(hwnd_progman, 0x052C, 0, 0, 0, 1000, ctypes.byref(ctypes.c_ulong()))
 
@@ -261,18 +750,62 @@ def set_as_wallpaper(window):
         ctypes.windll.user32.SetWindowPos(hwnd, 0, 0, 0, window.width(), window.height(),
                                          0x0040 | 0x0004 | 0x0010)
 
+def stats_text():
+    return tracing.summary_text() + "\n\n" + memstats.summary_text()
+
+def show_stats(parent=None):
+    """Show recent refresh breakdowns, per-host latencies and memory counters, with JSON lines export."""
+    dialog = QDialog(parent)
+    dialog.setWindowTitle("Stats")
+    dialog.resize(760, 480)
+    text = QPlainTextEdit(stats_text())
+    text.setReadOnly(True)
+    text.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+    buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+    update_button = buttons.addButton("Update", QDialogButtonBox.ButtonRole.ActionRole)
+    track_button = buttons.addButton("Track allocations", QDialogButtonBox.ButtonRole.ActionRole)
+    track_button.setEnabled(not tracemalloc.is_tracing())
+    export_button = buttons.addButton("Export...", QDialogButtonBox.ButtonRole.ActionRole)
+    export_button.setEnabled(tracing.enabled)
+
+    def track():
+        # Stays on until quit; tracing slows every allocation down a little
+        tracemalloc.start()
+        track_button.setEnabled(False)
+        text.setPlainText(stats_text())
+
+    def export():
+        path, _ = QFileDialog.getSaveFileName(dialog, "Export trace", "trace.jsonl", "JSON lines (*.jsonl)")
+        if path:
+            tracing.export_jsonl(path)
+
+    update_button.clicked.connect(lambda: text.setPlainText(stats_text()))
+    track_button.clicked.connect(track)
+    export_button.clicked.connect(export)
+    buttons.rejected.connect(dialog.reject)
+    layout = QVBoxLayout(dialog)
+    layout.addWidget(text)
+    layout.addWidget(buttons)
+    dialog.exec()
+
 def create_tray_icon(app, window):
     tray = QSystemTrayIcon()
     tray.setIcon(QIcon("sora.ico"))
 
     tray.menu = QMenu()
     tray.refresh_action = QAction("Refresh")
+    tray.full_refresh_action = QAction("Full Refresh")
+    tray.stats_action = QAction("Stats")
     tray.quit_action = QAction("Quit")
 
     tray.menu.addAction(tray.refresh_action)
+    tray.menu.addAction(tray.full_refresh_action)
+    tray.menu.addAction(tray.stats_action)
     tray.menu.addAction(tray.quit_action)
 
-    tray.refresh_action.triggered.connect(window.refresh_data)
+    tray.refresh_action.triggered.connect(lambda: window.refresh_data())
+    tray.full_refresh_action.triggered.connect(lambda: window.refresh_data(force_refresh=True))
+    tray.stats_action.triggered.connect(lambda: show_stats())
     tray.quit_action.triggered.connect(app.quit)
 
     tray.setContextMenu(tray.menu)
@@ -295,6 +828,10 @@ def create_tray_icon(app, window):
 
 
 def main():
+    if getattr(config, "RENDER_MODE", "widgets") == "image":
+        import render
+        sys.exit(render.main(["--set-wallpaper"]))
+
     app = QApplication([])
 
     try:
@@ -320,6 +857,7 @@ def main():
         Qt.WindowType.WindowDoesNotAcceptFocus
     )
     window.show()
+    app.aboutToQuit.connect(window.cancel_refresh)
 
     set_as_wallpaper(window)
 
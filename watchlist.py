@@ -0,0 +1,126 @@
+import datetime
+import os
+import time
+
+import cache
+
+LIST_VERSION = 1
+
+def list_path():
+    return os.path.join(cache.CACHE_DIR, "watching.json")
+
+def updated_at(entry):
+    """list_status.updated_at of a list entry in seconds since the epoch, 0 if missing."""
+    value = (entry.get("list_status") or {}).get("updated_at")
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+class WatchingList:
+    """Persistent copy of the user's watching list, kept in sync with MAL.
+
+    A full sync replaces the whole copy. In between, only entries updated at
+    or after the watermark (the newest updated_at seen) are applied; entries
+    that moved to another status leave the copy. Values derived from each
+    entry are kept until that entry changes.
+    """
+    def __init__(self, path=None):
+        self.path = path or list_path()
+        self.username = None
+        self.fields = None
+        self.entries = {}
+        self.watermark = 0.0
+        self.full_synced_at = 0.0
+        self.derived_key = None
+        self.derived = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path=None):
+        watching = cls(path)
+        loaded = cache.load_versioned_json(watching.path, LIST_VERSION, "watching list copy", lambda data: {
+            "username": data["username"],
+            "fields": data["fields"],
+            "entries": {int(mal_id): entry for mal_id, entry in data["entries"].items()},
+            "watermark": data["watermark"],
+            "full_synced_at": data["full_synced_at"],
+            "derived_key": data["derived_key"],
+            "derived": {int(mal_id): value for mal_id, value in data["derived"].items()}
+        })
+        if loaded is not None:
+            vars(watching).update(loaded)
+        return watching
+
+    def save(self):
+        if not self.dirty:
+            return
+        if cache.save_versioned_json(self.path, LIST_VERSION, "watching list copy", {
+            "username": self.username,
+            "fields": self.fields,
+            "entries": self.entries,
+            "watermark": self.watermark,
+            "full_synced_at": self.full_synced_at,
+            "derived_key": self.derived_key,
+            "derived": self.derived
+        }):
+            self.dirty = False
+
+    def list(self):
+        return list(self.entries.values())
+
+    def needs_full_sync(self, username, fields, max_age, now=None):
+        now = time.time() if now is None else now
+        return self.username != username or self.fields != fields or now - self.full_synced_at >= max_age
+
+    def replace(self, username, fields, entries, now=None):
+        """Install a full copy of the list. Returns the MAL IDs added, changed or dropped."""
+        new = {entry["node"]["id"]: entry for entry in entries}
+        changed = {mal_id for mal_id in new.keys() | self.entries.keys() if new.get(mal_id) != self.entries.get(mal_id)}
+        self.username = username
+        self.fields = fields
+        self.entries = new
+        self.watermark = max((updated_at(entry) for entry in entries), default=0.0)
+        self.full_synced_at = time.time() if now is None else now
+        self.forget(changed)
+        self.dirty = True
+        return changed
+
+    def apply_changes(self, items):
+        """Apply list entries of any status updated since the watermark. Returns the MAL IDs that changed."""
+        changed = set()
+        for item in items:
+            mal_id = item["node"]["id"]
+            if updated_at(item) > self.watermark:
+                self.watermark = updated_at(item)
+                self.dirty = True
+            if item["list_status"].get("status") == "watching":
+                if self.entries.get(mal_id) != item:
+                    self.entries[mal_id] = item
+                    changed.add(mal_id)
+            elif self.entries.pop(mal_id, None) is not None:
+                changed.add(mal_id)
+        if changed:
+            self.forget(changed)
+            self.dirty = True
+        return changed
+
+    def forget(self, mal_ids):
+        for mal_id in mal_ids:
+            self.derived.pop(mal_id, None)
+
+    def derive(self, key, fn):
+        """{mal_id: fn(entry)} in list order.
+
+        Results are kept while key stays the same and are recomputed only for
+        entries added or changed since.
+        """
+        if key != self.derived_key:
+            self.derived_key = key
+            self.derived = {}
+        missing = self.entries.keys() - self.derived.keys()
+        for mal_id in missing:
+            self.derived[mal_id] = fn(self.entries[mal_id])
+        if missing:
+            self.dirty = True
+        return {mal_id: self.derived[mal_id] for mal_id in self.entries}